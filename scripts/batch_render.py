@@ -0,0 +1,159 @@
+# batch_render.py
+# 批量渲染：扫描 题目/<n>/output/render_task.json，每个题目在独立的进程里渲染一个 UGPScene
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import tts_prefetch
+from layout_config import UGP_CONFIG
+from profiler import TRACER, format_summary, merge_summaries
+
+# ================= Configuration =================
+PROBLEM_ROOT = "../题目"
+TASK_GLOB = "*/output/render_task.json"
+VIDEO_NAME = "lesson.mp4"               # 每个题目输出到 题目/<n>/output/lesson.mp4
+SUMMARY_FILE = "batch_summary.json"
+DEFAULT_QUALITY = "low_quality"
+
+
+def discover_tasks(root=PROBLEM_ROOT):
+    """找出 root 下所有题目的 render_task.json，按题号排序（数字题号按数值排）。"""
+    paths = glob.glob(os.path.join(root, TASK_GLOB))
+
+    def problem_key(path):
+        name = os.path.basename(os.path.dirname(os.path.dirname(path)))
+        return (0, int(name), "") if name.isdigit() else (1, 0, name)
+
+    return [os.path.abspath(p) for p in sorted(paths, key=problem_key)]
+
+
+def render_task(task_path, quality=DEFAULT_QUALITY):
+    """
+    在当前进程里渲染一个 render_task.json。
+    返回结果记录 (题号 / 状态 / 视频路径 / 耗时 / 错误信息)，不向外抛异常。
+    """
+    # 渲染模块在 worker 里导入
+    import svg_cache
+    from renderer import render_task_file
+
+    out_dir = os.path.dirname(task_path)
+    record = {
+        "problem": os.path.basename(os.path.dirname(out_dir)),
+        "task": task_path,
+        "status": "ok",
+        "video": None,
+        "error": None,
+    }
+    start = time.perf_counter()
+    before = svg_cache.stats()
+    try:
+        record["video"] = render_task_file(task_path, os.path.join(out_dir, VIDEO_NAME), quality)
+    except Exception:
+        record["status"] = "failed"
+        record["error"] = traceback.format_exc()
+    # worker 进程会连续处理多个题目，记录本题目的增量
+    record["svg_cache"] = {
+        name: {k: v - before[name][k] for k, v in counts.items()}
+        for name, counts in svg_cache.stats().items()
+    }
+    if TRACER.enabled:
+        # UGP_PROFILE 打开时附上本题目的分阶段耗时汇总 (完整 trace 另存在 UGP_PROFILE 下)
+        record["profile"] = TRACER.summary()
+
+    record["wall_time"] = round(time.perf_counter() - start, 2)
+    return record
+
+
+def prefetch_all(task_paths):
+    """整批任务的台词和 TeX 表达式一次性准备好 (都进共享缓存)，worker 渲染时全部命中。"""
+    import svg_cache
+    import tex_batch
+
+    task_datas = []
+    for path in task_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            task_datas.append(json.load(f))
+    engine = os.environ.get("UGP_TTS_ENGINE", UGP_CONFIG["tts_engine"])
+    tts_prefetch.prefetch(task_datas, engine, lang=UGP_CONFIG["tts_lang"], voice=UGP_CONFIG["tts_voice"],
+                          concurrency=UGP_CONFIG["tts_concurrency"])
+    svg_cache.install()
+    tex_batch.precompile(task_datas)
+
+
+def render_all(task_paths, workers, quality=DEFAULT_QUALITY):
+    """用进程池并行渲染，每个 worker 进程持有自己的 Cairo 渲染器。"""
+    results = []
+    # spawn：每个 worker 拿到干净的 manim 全局 config，不继承主进程状态
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {pool.submit(render_task, p, quality): p for p in task_paths}
+        for future in as_completed(futures):
+            record = future.result()
+            results.append(record)
+            mark = "✅" if record["status"] == "ok" else "❌"
+            print(f"{mark} [{len(results)}/{len(task_paths)}] 题目 {record['problem']} ({record['wall_time']}s)")
+    results.sort(key=lambda r: task_paths.index(r["task"]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量渲染所有题目的 UGPScene")
+    parser.add_argument("--root", default=PROBLEM_ROOT, help="题目根目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行进程数 (默认 = CPU 核数)")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY,
+                        choices=["low_quality", "medium_quality", "high_quality", "production_quality", "fourk_quality"])
+    parser.add_argument("--summary", default=SUMMARY_FILE, help="汇总结果输出路径")
+    args = parser.parse_args()
+
+    task_paths = discover_tasks(args.root)
+    if not task_paths:
+        print(f"❌ 错误：在 {args.root} 下没有找到任何 {TASK_GLOB}")
+        return 1
+
+    workers = max(1, min(args.workers, len(task_paths)))
+    start = time.perf_counter()
+
+    print(f"🔊 预取 {len(task_paths)} 个题目的配音和公式 ...")
+    prefetch_all(task_paths)
+    # 共享 svg 缓存只在主进程里淘汰一次，worker 不再各自扫描
+    import svg_cache
+    svg_cache.evict()
+
+    print(f"🚀 共 {len(task_paths)} 个题目，使用 {workers} 个进程渲染 ...")
+    results = render_all(task_paths, workers, args.quality)
+    wall_time = time.perf_counter() - start
+
+    failed = [r for r in results if r["status"] != "ok"]
+    summary = {
+        "workers": workers,
+        "quality": args.quality,
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "wall_time": round(wall_time, 2),
+        "render_time_sum": round(sum(r["wall_time"] for r in results), 2),
+        "results": results,
+    }
+    profiles = [r["profile"] for r in results if r.get("profile")]
+    if profiles:
+        summary["profile"] = merge_summaries(profiles)
+    with open(args.summary, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print("-" * 30)
+    print(f"✅ 成功 {summary['succeeded']} / ❌ 失败 {summary['failed']}，总耗时 {summary['wall_time']}s")
+    for r in failed:
+        print(f"   ❌ 题目 {r['problem']}: {r['error'].strip().splitlines()[-1]}")
+    if profiles:
+        print(format_summary(summary["profile"]))
+        TRACER.write("batch")  # 主进程里的预取阶段
+    print(f"📄 汇总已保存至: {args.summary}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
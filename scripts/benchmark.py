@@ -0,0 +1,177 @@
+# benchmark.py
+# 渲染器性能基准：用 synth_task 生成固定规模的任务，离线 TTS (stub 引擎) 渲染，
+# 记录 帧率 / 每步耗时 / 峰值内存，结果存 JSON，并和保存的 baseline 比较找回归。
+#
+#   python benchmark.py                                 # 跑全部场景，结果写到 ../bench/results/
+#   python benchmark.py --cases small math_heavy --save-baseline
+#   python benchmark.py --baseline ../bench/baseline.json   # 有回归时退出码为 1
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# ================= Configuration =================
+BENCH_DIR = "../bench"
+BASELINE_FILE = "baseline.json"
+DEFAULT_QUALITY = "low_quality"
+DEFAULT_THRESHOLD = 0.10    # 帧率下降 / 每步耗时或内存上升超过 10% 算回归
+
+# 场景 -> synth_task.generate_task 的参数
+CASES = {
+    "small":       {"n_points": 6, "n_steps": 10, "voice_chars": 30},
+    "medium":      {"n_points": 20, "n_steps": 60, "voice_chars": 50},
+    "large":       {"n_points": 60, "n_steps": 200, "voice_chars": 60, "actions_per_step": 2},
+    "math_heavy":  {"n_points": 8, "n_steps": 60, "voice_chars": 40, "mix": {"WRITE_MATH": 1}},
+    "shape_heavy": {"n_points": 40, "n_steps": 60, "voice_chars": 40,
+                    "mix": {"DRAW_SHAPE": 3, "DRAW_ARC": 2, "HIGHLIGHT": 1}},
+    "no_voice":    {"n_points": 8, "n_steps": 40, "voice_chars": 0},
+}
+
+
+def _run_case(task_path, quality):
+    """在独立的 worker 进程里渲染一次 (峰值内存只算这一个任务)。"""
+    from renderer import render_task_file
+    from video_tools import count_frames
+
+    output_path = os.path.join(os.path.dirname(task_path), "bench.mp4")
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    render_task_file(task_path, output_path, quality)
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": wall,
+        "cpu_s": time.process_time() - start_cpu,
+        "frames": count_frames(output_path),
+        # ru_maxrss 单位 KB；CHILDREN 是 manim 拉起的 ffmpeg / latex 等子进程
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def run_case(name, params, work_dir, quality=DEFAULT_QUALITY, repeat=1, cold=False):
+    """生成任务并渲染 repeat 次，取最快的一次。cold=True 时每次都用空的 TTS / svg 缓存。"""
+    from synth_task import write_task
+
+    task_path = write_task(os.path.join(work_dir, name, "output", "render_task.json"), **params)
+    runs = []
+    for i in range(repeat):
+        env = {"UGP_TTS_ENGINE": "stub"}
+        if cold:
+            cache_dir = os.path.join(work_dir, name, f"cache{i}")
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            env.update(UGP_TTS_CACHE=os.path.join(cache_dir, "tts"), UGP_SVG_CACHE=os.path.join(cache_dir, "svg"))
+        # spawn 的子进程在创建时继承 os.environ；缓存目录这类模块级配置只能这样传进去
+        saved = {k: os.environ.get(k) for k in env}
+        os.environ.update(env)
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                runs.append(pool.submit(_run_case, task_path, quality).result())
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+    best = min(runs, key=lambda r: r["wall_s"])
+    n_steps = params["n_steps"]
+    return {
+        "case": name,
+        "params": params,
+        "runs": len(runs),
+        "frames": best["frames"],
+        "wall_s": round(best["wall_s"], 3),
+        "cpu_s": round(best["cpu_s"], 3),
+        "fps": round(best["frames"] / best["wall_s"], 2),
+        "s_per_step": round(best["wall_s"] / n_steps, 4),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+        "children_peak_rss_mb": round(max(r["children_peak_rss_mb"] for r in runs), 1),
+    }
+
+
+def environment_info(quality):
+    try:
+        import manim
+        manim_version = manim.__version__
+    except Exception:
+        manim_version = None
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "manim": manim_version,
+        "cpu_count": os.cpu_count(),
+        "quality": quality,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """和 baseline 逐场景比较，返回回归列表 (越慢 / 越占内存才算，变快不报)。"""
+    base_cases = {r["case"]: r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        base = base_cases.get(r["case"])
+        if base is None or base["params"] != r["params"]:
+            continue  # 场景定义变了，没有可比性
+        checks = [
+            ("fps", base["fps"] / r["fps"] - 1 if r["fps"] else float("inf")),
+            ("s_per_step", r["s_per_step"] / base["s_per_step"] - 1),
+            ("peak_rss_mb", r["peak_rss_mb"] / base["peak_rss_mb"] - 1),
+        ]
+        for metric, change in checks:
+            if change > threshold:
+                regressions.append({"case": r["case"], "metric": metric, "baseline": base[metric],
+                                    "current": r[metric], "change": round(change, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="渲染器性能基准")
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), help="只跑这些场景 (默认全部)")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY)
+    parser.add_argument("--repeat", type=int, default=1, help="每个场景重复次数，取最快一次")
+    parser.add_argument("--cold", action="store_true", help="每次都用空的 TTS / svg 缓存")
+    parser.add_argument("--bench-dir", default=BENCH_DIR)
+    parser.add_argument("--baseline", help="baseline JSON (默认 <bench-dir>/baseline.json，存在时自动比较)")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为 baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    work_dir = os.path.abspath(os.path.join(args.bench_dir, "tasks"))
+    results = []
+    for name in args.cases or list(CASES):
+        print(f"⏱️ {name} ...")
+        r = run_case(name, CASES[name], work_dir, args.quality, max(1, args.repeat), args.cold)
+        results.append(r)
+        print(f"   {r['frames']} 帧  {r['wall_s']}s  {r['fps']} fps  {r['s_per_step']}s/步  {r['peak_rss_mb']} MB")
+
+    report = {"environment": environment_info(args.quality), "results": results}
+    baseline_path = args.baseline or os.path.join(args.bench_dir, BASELINE_FILE)
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            report["regressions"] = compare(results, json.load(f), args.threshold)
+        report["baseline"] = os.path.abspath(baseline_path)
+
+    results_dir = os.path.join(args.bench_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    result_path = os.path.join(results_dir, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        shutil.copyfile(result_path, os.path.join(args.bench_dir, BASELINE_FILE))
+
+    print("-" * 30)
+    print(f"📄 结果已保存至: {result_path}")
+    for reg in report.get("regressions", []):
+        print(f"   ⚠️ 回归 {reg['case']}.{reg['metric']}: {reg['baseline']} -> {reg['current']} (+{reg['change']:.0%})")
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,254 @@
+# build.py
+# 整条流水线的增量构建：grid -> task -> layout -> audio -> video，按题目、按阶段记录输入内容哈希，
+# 只重跑输入变化了的阶段；不同题目、互不依赖的阶段并行执行。
+#
+#   python build.py                  # 构建 ../题目 下所有题目
+#   python build.py --only 1 3 -j 8  # 只构建题目 1 和 3
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from segments import source_digest, tts_settings
+
+# ================= Configuration =================
+PROBLEM_ROOT = "../题目"
+STATE_FILE = ".build_state.json"    # 每个题目 output/ 下一份
+DEFAULT_QUALITY = "low_quality"
+
+
+# =======================================================
+# 📦 各阶段
+# =======================================================
+def _paths(problem_dir):
+    name = os.path.basename(os.path.normpath(problem_dir))
+    out = os.path.join(problem_dir, "output")
+    return {
+        "image": os.path.join(problem_dir, f"题目{name}_题目.jpg"),
+        "grid": os.path.join(problem_dir, f"题目{name}_题目_grid.jpg"),
+        "logic": os.path.join(out, "1_logic.json"),
+        "raw": os.path.join(out, "2_raw_layout.json"),
+        "timeline": os.path.join(out, "3_timeline.json"),
+        "task": os.path.join(out, "render_task.json"),
+        "layout": os.path.join(out, "final_layout.json"),
+        "video": os.path.join(out, "lesson.mp4"),
+    }
+
+
+def _run_grid(problem_dir, options):
+    from utils import add_smart_grid
+    p = _paths(problem_dir)
+    add_smart_grid(p["image"], p["grid"], _grid_max_side())
+
+
+def _run_task(problem_dir, options):
+    from gen_taskjson import build_task, problem_paths
+    build_task(*problem_paths(problem_dir))
+
+
+def _run_layout(problem_dir, options):
+    # 坐标归一化 + 离群点截断，renderer 读取 (见 renderer.load_task)
+    from get_norm import write_final_layout
+    p = _paths(problem_dir)
+    write_final_layout(p["raw"], p["image"], p["layout"])
+
+
+def _run_audio(problem_dir, options):
+    # 只会合成缓存里没有的句子，改一句台词只重新合成这一句
+    from batch_render import prefetch_all
+    prefetch_all([_paths(problem_dir)["task"]])
+
+
+def _run_video(problem_dir, options):
+    # 按步增量渲染：只重渲染内容变化的步骤
+    from incremental_render import render_incremental
+    p = _paths(problem_dir)
+    render_incremental(p["task"], p["video"], options["quality"])
+
+
+def _grid_max_side():
+    from gen_grid import MAX_SIDE
+    return MAX_SIDE
+
+
+# 每个阶段：依赖的阶段、输入文件、输出文件、影响结果的额外参数、执行函数
+STAGES = {
+    "grid": {
+        "deps": [],
+        "inputs": lambda p: [p["image"]],
+        "outputs": lambda p: [p["grid"]],
+        "extra": lambda options: [_grid_max_side()],
+        "run": _run_grid,
+    },
+    "task": {
+        "deps": [],
+        "inputs": lambda p: [p["logic"], p["raw"], p["timeline"], p["image"]],
+        "outputs": lambda p: [p["task"]],
+        "extra": lambda options: [],
+        "run": _run_task,
+    },
+    "layout": {
+        "deps": ["task"],
+        "inputs": lambda p: [p["raw"], p["image"]],
+        "outputs": lambda p: [p["layout"]],
+        "extra": lambda options: [],
+        "run": _run_layout,
+    },
+    "audio": {
+        "deps": ["task"],
+        "inputs": lambda p: [p["task"]],
+        "outputs": lambda p: [],
+        "extra": lambda options: tts_settings(),
+        "run": _run_audio,
+    },
+    "video": {
+        "deps": ["task", "layout", "audio"],
+        "inputs": lambda p: [p["task"], p["layout"]],
+        "outputs": lambda p: [p["video"]],
+        "extra": lambda options: [source_digest(), tts_settings(), options["quality"]],
+        "run": _run_video,
+    },
+}
+
+
+# =======================================================
+# 🔍 哈希与状态
+# =======================================================
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_hash(stage, problem_dir, options):
+    """阶段输入的内容哈希；输入文件缺失时返回 None。"""
+    spec = STAGES[stage]
+    digest = hashlib.sha256(stage.encode())
+    for path in spec["inputs"](_paths(problem_dir)):
+        if not os.path.exists(path):
+            return None
+        digest.update(os.path.basename(path).encode())
+        digest.update(_file_digest(path).encode())
+    digest.update(json.dumps(spec["extra"](options), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_state(problem_dir):
+    try:
+        with open(os.path.join(problem_dir, "output", STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(problem_dir, state):
+    path = os.path.join(problem_dir, "output", STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _run_stage(stage, problem_dir, options):
+    """在 worker 进程里执行一个阶段，返回 (耗时, 错误信息)。"""
+    start = time.perf_counter()
+    try:
+        STAGES[stage]["run"](problem_dir, options)
+        return time.perf_counter() - start, None
+    except Exception:
+        return time.perf_counter() - start, traceback.format_exc()
+
+
+# =======================================================
+# 🏗️ 调度
+# =======================================================
+def build(problem_dirs, workers, options, force=False):
+    """
+    依赖满足的 (题目, 阶段) 立即进入进程池；阶段的输入哈希和上次成功构建时一致且输出都在，就跳过。
+    返回 {题目: {阶段: "built" / "up-to-date" / "failed" / "blocked" / "missing-input"}}。
+    """
+    states = {d: load_state(d) for d in problem_dirs}
+    results = {d: {} for d in problem_dirs}
+    pending = {(d, s) for d in problem_dirs for s in STAGES}
+    running = {}
+
+    def ready(d, s):
+        return all(results[d].get(dep) in ("built", "up-to-date") for dep in STAGES[s]["deps"])
+
+    def blocked(d, s):
+        return any(results[d].get(dep) in ("failed", "blocked", "missing-input") for dep in STAGES[s]["deps"])
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        while pending or running:
+            for d, s in sorted(pending):
+                if blocked(d, s):
+                    results[d][s] = "blocked"
+                elif ready(d, s):
+                    digest = input_hash(s, d, options)
+                    outputs_ok = all(os.path.exists(p) for p in STAGES[s]["outputs"](_paths(d)))
+                    if digest is None:
+                        results[d][s] = "missing-input"
+                    elif not force and outputs_ok and states[d].get(s) == digest:
+                        results[d][s] = "up-to-date"
+                    else:
+                        running[pool.submit(_run_stage, s, d, options)] = (d, s, digest)
+                        results[d][s] = "running"
+                else:
+                    continue
+                pending.discard((d, s))
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                d, s, digest = running.pop(future)
+                elapsed, error = future.result()
+                name = os.path.basename(d)
+                if error is None:
+                    results[d][s] = "built"
+                    states[d][s] = digest
+                    save_state(d, states[d])
+                    print(f"✅ 题目 {name} · {s} ({elapsed:.1f}s)")
+                else:
+                    results[d][s] = "failed"
+                    states[d].pop(s, None)
+                    save_state(d, states[d])
+                    print(f"❌ 题目 {name} · {s}: {error.strip().splitlines()[-1]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量构建所有题目的流水线")
+    parser.add_argument("--root", default=PROBLEM_ROOT)
+    parser.add_argument("--only", nargs="*", help="只构建这些题号")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--quality", default=DEFAULT_QUALITY)
+    parser.add_argument("--force", action="store_true", help="忽略记录的哈希，全部重建")
+    args = parser.parse_args()
+
+    names = args.only or sorted(d for d in os.listdir(args.root) if os.path.isdir(os.path.join(args.root, d, "output")))
+    problem_dirs = [os.path.abspath(os.path.join(args.root, n)) for n in names]
+
+    start = time.perf_counter()
+    # 共享 svg 缓存在入口淘汰一次，各阶段的 worker 不再各自扫描
+    import svg_cache
+    svg_cache.evict()
+    results = build(problem_dirs, max(1, args.workers), {"quality": args.quality}, args.force)
+
+    print("-" * 30)
+    counts = {}
+    for stages in results.values():
+        for status in stages.values():
+            counts[status] = counts.get(status, 0) + 1
+    print("📊 " + "  ".join(f"{k}: {v}" for k, v in sorted(counts.items())) + f"  ({time.perf_counter() - start:.1f}s)")
+    return 1 if counts.get("failed") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+# disk_cache.py
+# 通用的内容寻址磁盘缓存：key = 内容哈希，原子写入，按字节预算做 LRU 淘汰
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# 最近被访问过的条目在这段时间内不会被淘汰 (防止别的进程刚拿到路径就被删掉)
+EVICT_GRACE_SECONDS = 600
+# 淘汰要遍历整个缓存目录，不能每次写入都做：本进程累计写入超过预算的这个比例，
+# 或者距上次 (任意进程) 扫描超过这么久，才扫描一次。超出预算的量因此有上限：进程数 x 预算 / EVICT_EVERY_FRACTION
+EVICT_EVERY_FRACTION = 50
+EVICT_INTERVAL_SECONDS = 300
+_EVICT_STAMP = "evict.stamp"
+
+# 缓存目录多个用户共享：写入的文件按 umask 给权限 (mkstemp 默认只有 0600)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def make_key(*parts):
+    """把任意可 JSON 序列化的内容组合成稳定的 sha256 key。"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    目录结构: <root>/<key[:2]>/<key><ext>
+    同一个 key 可以挂多个文件 (例如 .mp3 和它的 .json 元数据)，淘汰时一起删除。
+    锁文件放在旁边的 <root>.locks/ 里，条目被淘汰时一起删除。
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = os.path.abspath(root)
+        self.lock_dir = self.root.rstrip(os.sep) + ".locks"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.written = 0    # 本进程上次扫描之后写入的字节数
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key, ext):
+        return os.path.join(self.root, key[:2], key + ext)
+
+    def get(self, key, ext):
+        """命中返回文件路径并刷新访问时间 (LRU)，未命中返回 None。"""
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    @contextmanager
+    def writing(self, key, ext):
+        """
+        写入一个条目：yield 一个同目录下的临时路径，写完后 os.replace 原子地放到位。
+        多个进程同时写同一个 key 时，读者永远只会看到完整的文件。
+        """
+        final_path = self.path(key, ext)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=ext, dir=os.path.dirname(final_path))
+        os.close(fd)
+        try:
+            yield tmp_path
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.written += os.path.getsize(final_path)
+        self.maybe_evict()
+
+    def maybe_evict(self):
+        """写入之后调用：只有累计写入够多或距上次扫描够久时才真正 evict()，写入的开销不随缓存大小增长。"""
+        stamp = os.path.join(self.lock_dir, _EVICT_STAMP)
+        if self.written < self.max_bytes // EVICT_EVERY_FRACTION:
+            try:
+                if time.time() - os.stat(stamp).st_mtime < EVICT_INTERVAL_SECONDS:
+                    return 0
+            except FileNotFoundError:
+                pass
+        return self.evict()
+
+    @contextmanager
+    def lock(self, key, blocking=True):
+        """
+        跨进程文件锁 (fcntl.flock)：同一个 key 同时只有一个进程在生成。
+        yield 是否拿到了锁；blocking=False 时拿不到锁立即 yield False。
+        """
+        path = os.path.join(self.lock_dir, key + ".lock")
+        while True:
+            os.makedirs(self.lock_dir, exist_ok=True)
+            with open(path, "a") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+                # 等锁期间锁文件可能被清理 (_remove_lock_file) 删掉、又被别的进程重新建出来：
+                # 手里这把锁锁的是已经不在目录里的旧 inode，和新文件上的锁互不排斥，重新打开再锁
+                try:
+                    stale = os.fstat(f.fileno()).st_ino != os.stat(path).st_ino
+                except FileNotFoundError:
+                    stale = True
+                if stale:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                    continue
+                # 锁文件的 mtime 记最近一次使用，清理孤儿锁时最近用过的会被保留
+                os.utime(path)
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                return
+
+    def entries(self):
+        """按 key 汇总: {key: (最近访问时间, 总字节数, [文件路径])}"""
+        entries = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = name.split(".", 1)[0]
+                mtime, size, paths = entries.get(key, (0.0, 0, []))
+                entries[key] = (max(mtime, st.st_mtime), size + st.st_size, paths + [path])
+        return entries
+
+    def evict(self):
+        """总大小超出预算时，从最久未访问的条目开始删除。返回删除的条目数。"""
+        self.written = 0
+        # 已经有别的进程在淘汰就不重复扫描
+        with self.lock("evict", blocking=False) as locked:
+            if not locked:
+                return 0
+            # 扫描时间记在 stamp 的 mtime 上，各进程的 maybe_evict 据此跳过
+            with open(os.path.join(self.lock_dir, _EVICT_STAMP), "a"):
+                pass
+            os.utime(os.path.join(self.lock_dir, _EVICT_STAMP))
+            entries = self.entries()
+            removed = self._evict_locked(entries)
+            self._remove_orphan_locks(entries)
+            return removed
+
+    def _remove_lock_file(self, key):
+        """删除 key 的锁文件；有进程正持有这个锁时保留。"""
+        path = os.path.join(self.lock_dir, key + ".lock")
+        try:
+            with open(path, "a") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _remove_orphan_locks(self, entries):
+        """
+        没有对应条目的旧锁文件 (生成失败、或条目在别处被删) 也清掉，锁目录不会无限增长。
+        锁的 key 不一定是条目的文件名 (svg 缓存按内容加锁，文件名是 manim 自己的 hash)，
+        所以只删最近 EVICT_GRACE_SECONDS 内没人拿过的锁；删掉之后再用会重新建 (见 lock)。
+        """
+        now = time.time()
+        try:
+            names = os.listdir(self.lock_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            key, ext = os.path.splitext(name)
+            if ext != ".lock" or key == "evict" or key in entries:
+                continue
+            try:
+                if now - os.stat(os.path.join(self.lock_dir, name)).st_mtime < EVICT_GRACE_SECONDS:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._remove_lock_file(key)
+
+    def _evict_locked(self, entries):
+        total = sum(size for _, size, _ in entries.values())
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        now = time.time()
+        for key, (mtime, size, paths) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+            if total <= self.max_bytes:
+                break
+            if now - mtime < EVICT_GRACE_SECONDS:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            del entries[key]
+            self._remove_lock_file(key)
+            total -= size
+            removed += 1
+        return removed
@@ -1,24 +1,29 @@
-import asyncio
-import edge_tts
-import json
-import os
-
-async def generate_speech():
-    with open("几何/题目1_教学指令.json", "r", encoding="utf-8") as f:
-        steps = json.load(f)
-
-    if not os.path.exists("audio"):
-        os.makedirs("audio")
-
-    for i, step in enumerate(steps):
-        text = step["speech"]
-        # 使用云希（男声）或晓晓（女声）
-        voice = "zh-CN-YunxiNeural" 
-        output_file = f"audio/step_{i+1}.mp3"
-        
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(output_file)
-        print(f"Generated: {output_file}")
-
-if __name__ == "__main__":
+import asyncio
+import json
+import os
+import shutil
+from layout_config import UGP_CONFIG
+from tts_prefetch import collect_texts, prefetch_async
+
+async def generate_speech():
+    with open("几何/题目1_教学指令.json", "r", encoding="utf-8") as f:
+        steps = json.load(f)
+
+    if not os.path.exists("audio"):
+        os.makedirs("audio")
+
+    # 引擎、语言、音色、并发数和 renderer 读同一份配置 (UGP_TTS_ENGINE 可覆盖引擎)，
+    # 缓存 key 一致：这里合成过的句子渲染时直接命中，反之亦然。中文音色如 zh-CN-YunxiNeural (云希) 在 tts_voice 里设置
+    engine = os.environ.get("UGP_TTS_ENGINE", UGP_CONFIG["tts_engine"])
+    paths = await prefetch_async(collect_texts(steps), engine, lang=UGP_CONFIG["tts_lang"],
+                                 voice=UGP_CONFIG["tts_voice"], concurrency=UGP_CONFIG["tts_concurrency"])
+
+    for i, step in enumerate(steps):
+        if not step.get("speech"):
+            continue
+        output_file = f"audio/step_{i+1}.mp3"
+        shutil.copyfile(paths[step["speech"]], output_file)
+        print(f"Generated: {output_file}")
+
+if __name__ == "__main__":
     asyncio.run(generate_speech())
\ No newline at end of file
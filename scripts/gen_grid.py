@@ -1,25 +1,77 @@
-import os
-from utils import add_smart_grid
-
-# 假设你的原图放在这里
-INPUT_IMAGE = "../题目/1/题目1_题目.jpg"  
-OUTPUT_IMAGE = "../题目/1/题目1_题目_grid.jpg"
-
-def main():
-    if not os.path.exists(INPUT_IMAGE):
-        print(f"❌ 错误：找不到文件 {INPUT_IMAGE}，请先放一张图。")
-        return
-
-    print(f"🖼️ 正在处理图片: {INPUT_IMAGE} ...")
-    
-    # 调用 utils 函数
-    w, h = add_smart_grid(INPUT_IMAGE, OUTPUT_IMAGE)
-    
-    print(f"✅ 网格图已生成: {OUTPUT_IMAGE}")
-    print(f"📏 原始尺寸: {w} x {h}")
-    print(f"📐 逻辑最长边: 1000")
-    print("-" * 30)
-    print("👉 下一步：把这张 temp_grid_for_llm.jpg 发给 P2 大模型。")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import argparse
+import fnmatch
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils import add_smart_grid
+
+# 扫描整个题目目录树，原图 题目<n>_题目.jpg -> 题目<n>_题目_grid.jpg
+PROBLEM_ROOT = "../题目"
+IMAGE_PATTERN = "*_题目.jpg"
+GRID_SUFFIX = "_grid"
+MAX_SIDE = 2048            # 发给 LLM 的网格图最长边，大扫描件解码时就缩小
+
+def grid_path(image_path):
+    stem, ext = os.path.splitext(image_path)
+    return f"{stem}{GRID_SUFFIX}{ext}"
+
+def find_images(root, pattern=IMAGE_PATTERN):
+    """root 下所有匹配 pattern 的原图 (跳过已经是网格图的文件)。"""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if fnmatch.fnmatch(name, pattern) and not os.path.splitext(name)[0].endswith(GRID_SUFFIX):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+def is_up_to_date(image_path, output_path):
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(image_path)
+
+def _grid_one(image_path, max_side):
+    try:
+        return image_path, add_smart_grid(image_path, grid_path(image_path), max_side), None
+    except Exception as e:
+        return image_path, None, f"{type(e).__name__}: {e}"
+
+def grid_all(image_paths, workers, max_side=MAX_SIDE, force=False):
+    """并行生成网格图，输出比原图新的跳过。返回 (生成数, 跳过数, 失败列表)。"""
+    todo = [p for p in image_paths if force or not is_up_to_date(p, grid_path(p))]
+    failed = []
+    if todo:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo))), mp_context=ctx) as pool:
+            futures = [pool.submit(_grid_one, p, max_side) for p in todo]
+            for future in as_completed(futures):
+                path, size, error = future.result()
+                if error:
+                    failed.append((path, error))
+                    print(f"❌ {path}: {error}")
+                else:
+                    print(f"✅ {grid_path(path)}  ({size[0]} x {size[1]})")
+    return len(todo) - len(failed), len(image_paths) - len(todo), failed
+
+def main():
+    parser = argparse.ArgumentParser(description="给题目原图叠加 10x10 坐标网格")
+    parser.add_argument("images", nargs="*", help="只处理这几张图 (默认扫描 --root)")
+    parser.add_argument("--root", default=PROBLEM_ROOT)
+    parser.add_argument("--pattern", default=IMAGE_PATTERN)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-side", type=int, default=MAX_SIDE, help="输出最长边 (0 = 保持原尺寸)")
+    parser.add_argument("--force", action="store_true", help="忽略已有的网格图，全部重新生成")
+    args = parser.parse_args()
+
+    images = args.images or find_images(args.root, args.pattern)
+    if not images:
+        print(f"❌ 错误：在 {args.root} 下没有找到 {args.pattern}，请先放一张图。")
+        return 1
+
+    print(f"🖼️ 共 {len(images)} 张图，使用 {args.workers} 个进程 ...")
+    built, skipped, failed = grid_all(images, args.workers, args.max_side or None, args.force)
+
+    print("-" * 30)
+    print(f"✅ 生成 {built} 张，跳过 {skipped} 张 (已是最新)，失败 {len(failed)} 张")
+    print("👉 下一步：把网格图发给 P2 大模型。")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
@@ -1,81 +1,157 @@
-import json
-import os
-from PIL import Image
-from utils import normalize_coords
-
-# ================= Configuration =================
-# 定义输入输出路径 (在 pipeline 中通常由主控脚本传入，这里为了独立运行写在配置里)
-IMAGE_PATH = "input/problem.jpg"             # 真实来源：原始图片
-RAW_LAYOUT_PATH = "output/p2_raw_output.json" # 真实来源：P2 LLM 的输出文件
-OUTPUT_PATH = "output/final_layout.json"      # 目的地：清洗后的数据
-
-def main():
-    print("🚀 开始执行坐标归一化 (Production Mode)...")
-
-    # -------------------------------------------------
-    # 1. 动态获取图片真实尺寸 (Source of Truth: Image)
-    # -------------------------------------------------
-    if not os.path.exists(IMAGE_PATH):
-        print(f"❌ 错误：找不到图片文件: {IMAGE_PATH}")
-        return
-
-    # 只读取头部信息，不加载整个图片数据，速度很快
-    with Image.open(IMAGE_PATH) as img:
-        real_width, real_height = img.size
-        print(f"📏 [读取成功] 图片真实尺寸: {real_width} x {real_height}")
-
-    # -------------------------------------------------
-    # 2. 动态加载 LLM 的原始输出 (Source of Truth: P2 JSON)
-    # -------------------------------------------------
-    if not os.path.exists(RAW_LAYOUT_PATH):
-        print(f"❌ 错误：找不到 P2 的输出文件: {RAW_LAYOUT_PATH}")
-        print("💡 提示：请先运行 P2 步骤生成原始坐标数据。")
-        return
-
-    try:
-        with open(RAW_LAYOUT_PATH, "r", encoding="utf-8") as f:
-            llm_data = json.load(f)
-            
-            # 防御性编程：检查 key 是否存在
-            if "layout_map" not in llm_data:
-                raise ValueError("JSON 中缺少 'layout_map' 字段")
-            
-            raw_layout_map = llm_data["layout_map"]
-            print(f"📥 [读取成功] 获取到 {len(raw_layout_map)} 个点的原始坐标")
-            
-    except Exception as e:
-        print(f"❌ JSON 读取或解析失败: {e}")
-        return
-
-    # -------------------------------------------------
-    # 3. 执行核心算法 (引用 utils)
-    # -------------------------------------------------
-    print("🔄 正在计算坐标映射...")
-    
-    # 这一步完全基于读取到的 real_width/height 和 raw_layout_map
-    final_layout, canvas_size = normalize_coords(raw_layout_map, real_width, real_height)
-
-    # -------------------------------------------------
-    # 4. 保存结果到文件
-    # -------------------------------------------------
-    output_data = {
-        "meta_info": {
-            "source_image": IMAGE_PATH,
-            "original_size": [real_width, real_height],
-            "logic_canvas_size": canvas_size
-        },
-        "layout": final_layout
-    }
-
-    # 自动创建输出目录
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ [完成] 归一化数据已保存至: {OUTPUT_PATH}")
-    print(f"   逻辑画布尺寸: {canvas_size}")
-    print("👉 下一步：Renderer 将读取此文件进行绘图。")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import argparse
+import glob
+import json
+import os
+import time
+from PIL import Image
+from utils import COORD_UNITS, normalize_coords
+
+# ================= Configuration =================
+# 定义输入输出路径 (在 pipeline 中通常由主控脚本传入，这里为了独立运行写在配置里)
+IMAGE_PATH = "input/problem.jpg"             # 真实来源：原始图片
+RAW_LAYOUT_PATH = "output/p2_raw_output.json" # 真实来源：P2 LLM 的输出文件
+OUTPUT_PATH = "output/final_layout.json"      # 目的地：清洗后的数据
+FINAL_LAYOUT_NAME = os.path.basename(OUTPUT_PATH)  # 和 render_task.json 放在同一个 output 目录，renderer 读取
+
+# 批量模式
+PROBLEM_ROOT = "../题目"
+RAW_GLOB = "*/output/2_raw_layout.json"
+BATCH_OUTPUT = "normalized.jsonl"
+
+def image_size(image_path):
+    # 只读取头部信息，不加载整个图片数据，速度很快
+    with Image.open(image_path) as img:
+        return img.size
+
+def normalize_record(layout_map, image_path=None, size=None, units="auto"):
+    """一个题目的原始坐标 -> final_layout 结构。size 已知时不打开图片。"""
+    real_width, real_height = size or image_size(image_path)
+    final_layout, canvas_size = normalize_coords(layout_map, real_width, real_height, units=units)
+    return {
+        "meta_info": {
+            "source_image": image_path,
+            "original_size": [real_width, real_height],
+            "logic_canvas_size": canvas_size,
+            "outliers": [name for name, p in final_layout.items() if p["outlier"]],
+        },
+        "layout": final_layout,
+    }
+
+def write_final_layout(raw_path, image_path, output_path):
+    """一个题目：2_raw_layout.json + 原图 -> final_layout.json (build.py 的 layout 阶段)。返回 final_layout 结构。"""
+    output_data = normalize_record(load_layout_map(raw_path), image_path)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    return output_data
+
+def load_layout_map(raw_path):
+    with open(raw_path, "r", encoding="utf-8") as f:
+        llm_data = json.load(f)
+    # 防御性编程：检查 key 是否存在
+    if "layout_map" not in llm_data:
+        raise ValueError("JSON 中缺少 'layout_map' 字段")
+    return llm_data["layout_map"]
+
+def image_for_raw(raw_path):
+    """题目/<n>/output/2_raw_layout.json -> 题目/<n>/题目<n>_题目.jpg"""
+    problem_dir = os.path.dirname(os.path.dirname(os.path.abspath(raw_path)))
+    name = os.path.basename(problem_dir)
+    return os.path.join(problem_dir, f"题目{name}_题目.jpg")
+
+def iter_jobs(raw_paths=(), jsonl_path=None):
+    """
+    逐个产出 (id, layout_map, image_path, size)，不一次性读进内存。
+    JSONL 每行: {"id": .., "layout_map": {..} 或 "raw": 路径, "image": 路径, "size": [w, h] (可选)}
+    """
+    for raw_path in raw_paths:
+        yield raw_path, (lambda p=raw_path: load_layout_map(p)), image_for_raw(raw_path), None
+    if jsonl_path:
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if "layout_map" in item:
+                    loader = (lambda m=item["layout_map"]: m)
+                else:
+                    loader = (lambda p=item["raw"]: load_layout_map(p))
+                yield item.get("id", line_no), loader, item.get("image"), item.get("size")
+
+def normalize_batch(jobs, output_path, units="auto"):
+    """逐条归一化并立即写出一行 JSONL；单条出错只记录错误，不中断整批。返回 (成功数, 失败数, 离群点数)。"""
+    ok = failed = outliers = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for job_id, loader, image_path, size in jobs:
+            try:
+                record = normalize_record(loader(), image_path, size, units)
+                record["id"] = job_id
+                outliers += len(record["meta_info"]["outliers"])
+                ok += 1
+            except Exception as e:
+                record = {"id": job_id, "error": f"{type(e).__name__}: {e}"}
+                failed += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return ok, failed, outliers
+
+def run_single():
+    print("🚀 开始执行坐标归一化 (Production Mode)...")
+
+    # 1. 动态获取图片真实尺寸 (Source of Truth: Image)
+    if not os.path.exists(IMAGE_PATH):
+        print(f"❌ 错误：找不到图片文件: {IMAGE_PATH}")
+        return 1
+
+    # 2. 动态加载 LLM 的原始输出 (Source of Truth: P2 JSON)
+    if not os.path.exists(RAW_LAYOUT_PATH):
+        print(f"❌ 错误：找不到 P2 的输出文件: {RAW_LAYOUT_PATH}")
+        print("💡 提示：请先运行 P2 步骤生成原始坐标数据。")
+        return 1
+
+    try:
+        raw_layout_map = load_layout_map(RAW_LAYOUT_PATH)
+        print(f"📥 [读取成功] 获取到 {len(raw_layout_map)} 个点的原始坐标")
+    except Exception as e:
+        print(f"❌ JSON 读取或解析失败: {e}")
+        return 1
+
+    # 3. 执行核心算法 (引用 utils)
+    print("🔄 正在计算坐标映射...")
+    output_data = normalize_record(raw_layout_map, IMAGE_PATH)
+
+    # 4. 保存结果到文件 (自动创建输出目录)
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(output_data, f, indent=2, ensure_ascii=False)
+
+    meta = output_data["meta_info"]
+    print(f"✅ [完成] 归一化数据已保存至: {OUTPUT_PATH}")
+    print(f"   图片真实尺寸: {meta['original_size']}，逻辑画布尺寸: {meta['logic_canvas_size']}")
+    if meta["outliers"]:
+        print(f"⚠️ 离群点 (已截断到画面内): {', '.join(meta['outliers'])}")
+    print("👉 下一步：Renderer 将读取此文件进行绘图。")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="把 LLM 输出的坐标归一化到逻辑画布")
+    parser.add_argument("raw", nargs="*", help="2_raw_layout.json / p2_raw_output.json 路径")
+    parser.add_argument("--root", help=f"扫描 <root>/{RAW_GLOB}")
+    parser.add_argument("--jsonl", help="每行一个题目的 JSONL 输入")
+    parser.add_argument("-o", "--output", default=BATCH_OUTPUT, help="批量结果 (JSONL，逐条写出)")
+    parser.add_argument("--units", choices=COORD_UNITS, default="auto", help="坐标单位 (默认 逐点判断取多数)")
+    args = parser.parse_args()
+
+    raw_paths = list(args.raw)
+    if args.root:
+        raw_paths += sorted(glob.glob(os.path.join(args.root, RAW_GLOB)))
+    if not raw_paths and not args.jsonl:
+        # 不带参数：按上面的配置处理单个题目
+        return run_single()
+
+    start = time.perf_counter()
+    ok, failed, outliers = normalize_batch(iter_jobs(raw_paths, args.jsonl), args.output, args.units)
+    print(f"✅ 归一化 {ok} 个题目 (失败 {failed}，离群点 {outliers})，耗时 {time.perf_counter() - start:.2f}s")
+    print(f"📄 结果已保存至: {args.output}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
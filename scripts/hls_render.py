@@ -0,0 +1,113 @@
+# hls_render.py
+# 分段流式输出 (HLS)：时间轴每一步编码成一个可以独立解码的 .ts 分段 (带对齐的旁白)，
+# 每完成一段就更新一次 m3u8。审片工具可以在后面的步骤还在渲染时就开始播放第 1 步。
+import argparse
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from manim.constants import QUALITIES
+from narration import step_plan, write_narration
+from renderer import TASK_FILE, load_task, render_task_file
+from segments import get_segment_cache, step_hashes
+from video_tools import mux_ts_segment
+
+DEFAULT_QUALITY = "low_quality"
+HLS_DIR = "hls"
+PLAYLIST_NAME = "lesson.m3u8"
+
+
+def segment_name(i):
+    return f"step_{i:03d}.ts"
+
+
+def write_playlist(path, durations, target_duration, finished=False):
+    """
+    durations: 已完成分段的时长 (按步骤顺序，只含连续完成的前缀)。
+    EVENT 类型：播放器从头播放，并定时重新拉取列表拿到新分段；写临时文件再 os.replace，读者不会读到半个列表。
+    """
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{target_duration}",
+             "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:EVENT", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for i, duration in enumerate(durations):
+        lines += [f"#EXTINF:{duration:.6f},", segment_name(i)]
+    if finished:
+        lines.append("#EXT-X-ENDLIST")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _render_step(task_path, i, step_hash, quality):
+    """worker：渲染第 i 步的无声视频 (命中分段缓存时直接返回)。"""
+    cache = get_segment_cache()
+    path = cache.get(step_hash, ".mp4")
+    if path is None:
+        with cache.writing(step_hash, ".mp4") as tmp_path:
+            render_task_file(task_path, tmp_path, quality, step_range=(i, i + 1))
+        path = cache.get(step_hash, ".mp4")
+    return path
+
+
+def render_hls(task_path, out_dir, workers=1, quality=DEFAULT_QUALITY):
+    """按步骤顺序产出 out_dir/step_NNN.ts 和 out_dir/lesson.m3u8。返回 (分段数, 首段就绪耗时)。"""
+    task_data = load_task(task_path)
+
+    # 时长在渲染前就全部确定 (和 renderer 用的是同一份时间轴)，TARGETDURATION 一开始就能写对
+    frame_rate = QUALITIES[quality]["frame_rate"]
+    plan = step_plan(task_data, frame_rate)
+    hashes = step_hashes(task_data, quality)
+    target_duration = max([math.ceil(step["run_time"]) for step in plan] or [1])
+    first_frames = [0]
+    for step in plan:
+        first_frames.append(first_frames[-1] + step["frames"])
+
+    os.makedirs(out_dir, exist_ok=True)
+    playlist = os.path.join(out_dir, PLAYLIST_NAME)
+    write_playlist(playlist, [], target_duration)
+
+    start = time.perf_counter()
+    first_ready = None
+    durations = []
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=ctx) as pool, \
+            tempfile.TemporaryDirectory(prefix=".ugp-hls-", dir=out_dir) as work_dir:
+        # 全部提交，按顺序取结果：前面的步骤先提交先开工，列表只追加连续完成的前缀
+        futures = [pool.submit(_render_step, task_path, i, h, quality) for i, h in enumerate(hashes)]
+        for i, future in enumerate(futures):
+            video_path = future.result()
+            # 每段的音频按整课的采样边界切，拼起来和整条旁白逐采样一致
+            wav_path = write_narration([plan[i]], frame_rate, os.path.join(work_dir, f"step_{i:03d}.wav"),
+                                       first_frame=first_frames[i])
+            mux_ts_segment(video_path, wav_path, os.path.join(out_dir, segment_name(i)),
+                           first_frames[i] / frame_rate)
+            os.remove(wav_path)
+            durations.append(plan[i]["run_time"])
+            write_playlist(playlist, durations, target_duration)
+            if first_ready is None:
+                first_ready = time.perf_counter() - start
+            print(f"📺 第 {i + 1}/{len(plan)} 段就绪: {segment_name(i)} ({plan[i]['run_time']:.2f}s)")
+    write_playlist(playlist, durations, target_duration, finished=True)
+    return len(durations), first_ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 UGPScene 按步骤输出成 HLS (边渲染边可播放)")
+    parser.add_argument("task", nargs="?", default=TASK_FILE, help="render_task.json 路径")
+    parser.add_argument("--output-dir", help=f"分段和播放列表目录 (默认 与任务同目录的 {HLS_DIR}/)")
+    parser.add_argument("--workers", type=int, default=1, help="同时渲染的步骤数")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY)
+    args = parser.parse_args()
+
+    out_dir = args.output_dir or os.path.join(os.path.dirname(os.path.abspath(args.task)), HLS_DIR)
+    start = time.perf_counter()
+    n_segments, first_ready = render_hls(args.task, out_dir, args.workers, args.quality)
+    print(f"✅ 完成: {os.path.join(out_dir, PLAYLIST_NAME)}")
+    if n_segments:
+        print(f"   {n_segments} 段，首段 {first_ready:.1f}s 后可播放，总耗时 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# incremental_render.py
+# 增量渲染：每一步单独编码成一段并按内容哈希缓存，只重渲染变化的步骤，最后 stream copy 拼接并配上整条旁白
+import argparse
+import os
+import tempfile
+import time
+from manim.constants import QUALITIES
+from narration import add_narration, step_plan
+from renderer import TASK_FILE, load_task, render_task_file
+from segments import get_segment_cache, step_hashes
+from video_tools import concat_copy
+
+DEFAULT_QUALITY = "low_quality"
+
+
+def render_incremental(task_path, output_path, quality=DEFAULT_QUALITY):
+    """返回 (重新渲染的步数, 总步数)。"""
+    task_data = load_task(task_path)
+
+    cache = get_segment_cache()
+    hashes = step_hashes(task_data, quality)
+
+    rendered = 0
+    for i, step_hash in enumerate(hashes):
+        if cache.get(step_hash, ".mp4"):
+            continue
+        print(f"🎬 第 {i + 1}/{len(hashes)} 步有改动，重新渲染 ...")
+        with cache.writing(step_hash, ".mp4") as tmp_path:
+            render_task_file(task_path, tmp_path, quality, step_range=(i, i + 1))
+        rendered += 1
+
+    # 拼接前再取一次路径 (同时刷新 LRU 时间)，防止渲染期间被淘汰
+    segments = []
+    for step_hash in hashes:
+        path = cache.get(step_hash, ".mp4")
+        if path is None:
+            raise RuntimeError(f"分段 {step_hash} 在渲染期间被淘汰，请调大 UGP_SEGMENT_CACHE_MAX_BYTES 后重试")
+        segments.append(path)
+
+    # 分段都是无声的：拼接后按整课时间轴配上一条旁白
+    frame_rate = QUALITIES[quality]["frame_rate"]
+    with tempfile.TemporaryDirectory(prefix=".ugp-concat-", dir=os.path.dirname(os.path.abspath(output_path))) as work_dir:
+        video_path = concat_copy(segments, os.path.join(work_dir, "video.mp4"))
+        add_narration(step_plan(task_data, frame_rate), frame_rate, video_path, output_path)
+    return rendered, len(hashes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按步增量渲染 UGPScene")
+    parser.add_argument("task", nargs="?", default=TASK_FILE, help="render_task.json 路径")
+    parser.add_argument("--output", help="输出视频 (默认 与任务同目录的 lesson.mp4)")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY)
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.task)), "lesson.mp4")
+    start = time.perf_counter()
+    rendered, total = render_incremental(args.task, output, args.quality)
+    print(f"✅ 完成: {output}")
+    print(f"   重新渲染 {rendered}/{total} 步，复用 {total - rendered} 段，耗时 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
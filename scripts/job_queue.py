@@ -0,0 +1,314 @@
+# job_queue.py
+# 基于共享文件系统 (NFS) 的分布式任务队列：多台机器各自领取题目，跑 gen_taskjson -> 配音 -> UGPScene
+#
+#   python job_queue.py init --root ../题目        # 生成任务清单 (只需一台机器执行一次)
+#   python job_queue.py work --workers 4           # 每台机器上启动，领完所有任务后退出
+#   python job_queue.py status
+#
+# 目录结构 (QUEUE_DIR):
+#   manifest.json          任务清单
+#   jobs/<id>.json         每个任务的状态记录 (只有持有租约的节点会写)
+#   leases/<id>.lease      租约：O_EXCL 创建即领取，内容里有过期时间，心跳线程定期续期
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+# ================= Configuration =================
+QUEUE_DIR = os.environ.get("UGP_QUEUE", "../queue")
+LEASE_SECONDS = 300         # 租约有效期；节点崩溃后最多这么久任务会被别人接手
+HEARTBEAT_SECONDS = 30      # 续期间隔
+MAX_ATTEMPTS = 3            # 超过次数标记为 failed，不再重试
+STAGES = ("task", "audio", "video")
+DEFAULT_QUALITY = "low_quality"
+
+
+def _path(*parts):
+    return os.path.join(QUEUE_DIR, *parts)
+
+
+def _write_json(path, data):
+    """先写临时文件再 rename：别的节点读到的永远是完整的记录。"""
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def node_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# =======================================================
+# 📋 清单与状态
+# =======================================================
+def init_queue(root, quality=DEFAULT_QUALITY):
+    """为 root 下每个 题目/<n> 生成一条 pending 记录；已有记录的任务保持原状 (可重复执行)。"""
+    os.makedirs(_path("jobs"), exist_ok=True)
+    os.makedirs(_path("leases"), exist_ok=True)
+    problems = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d, "output")))
+    for name in problems:
+        record_path = _path("jobs", f"{name}.json")
+        if not os.path.exists(record_path):
+            _write_json(record_path, {
+                "id": name,
+                "problem_dir": os.path.abspath(os.path.join(root, name)),
+                "quality": quality,
+                "status": "pending",
+                "attempts": 0,
+                "stages_done": [],
+                "history": [],
+                "updated": time.time(),
+            })
+    _write_json(_path("manifest.json"), {"root": os.path.abspath(root), "jobs": problems, "created": time.time()})
+    return problems
+
+
+def load_records():
+    manifest = _read_json(_path("manifest.json"))
+    return [_read_json(_path("jobs", f"{job_id}.json")) for job_id in manifest["jobs"]]
+
+
+# =======================================================
+# 🔒 租约
+# =======================================================
+def _try_create_lease(job_id, node):
+    lease_path = _path("leases", f"{job_id}.lease")
+    try:
+        fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"node": node, "expires": time.time() + LEASE_SECONDS}, f)
+    return True
+
+
+def acquire_lease(job_id, node):
+    """
+    领取任务。租约已过期 (持有者崩溃或失联) 时，先把旧租约 rename 走再重新创建，只有一个节点能 rename 成功。
+    读过期时间和 rename 之间持有者可能刚好续期：rename 之后再核对一次拿走的是不是刚才读到的那份过期租约，
+    不是就放回去并放弃。
+    """
+    if _try_create_lease(job_id, node):
+        return True
+    lease_path = _path("leases", f"{job_id}.lease")
+    try:
+        lease = _read_json(lease_path)
+    except (FileNotFoundError, ValueError):
+        return False  # 正在被别人创建或刚被释放，下一轮再试
+    if lease["expires"] > time.time():
+        return False
+    stale_path = f"{lease_path}.stale-{uuid.uuid4().hex[:8]}"
+    try:
+        os.rename(lease_path, stale_path)
+    except FileNotFoundError:
+        return False
+    try:
+        taken = _read_json(stale_path)
+    except ValueError:
+        taken = None
+    if taken != lease:
+        # 拿走的是刚续期 / 新建的租约：用 link 放回 (不覆盖期间又出现的租约)，然后放弃
+        try:
+            os.link(stale_path, lease_path)
+        except FileExistsError:
+            pass
+        os.remove(stale_path)
+        return False
+    os.remove(stale_path)
+    return _try_create_lease(job_id, node)
+
+
+def release_lease(job_id):
+    try:
+        os.remove(_path("leases", f"{job_id}.lease"))
+    except FileNotFoundError:
+        pass
+
+
+class Heartbeat(threading.Thread):
+    """后台定期续租；发现租约已经不是自己的 (被判过期后别人接手)，置 lost 标志。"""
+
+    def __init__(self, job_id, node):
+        super().__init__(daemon=True)
+        self.job_id, self.node = job_id, node
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        lease_path = _path("leases", f"{self.job_id}.lease")
+        while not self.stopped.wait(HEARTBEAT_SECONDS):
+            try:
+                if _read_json(lease_path)["node"] != self.node:
+                    self.lost = True
+                    return
+            except (FileNotFoundError, ValueError):
+                self.lost = True
+                return
+            _write_json(lease_path, {"node": self.node, "expires": time.time() + LEASE_SECONDS})
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# =======================================================
+# 🏭 执行
+# =======================================================
+def run_stage(stage, record):
+    """执行一个阶段。各阶段的产物都落在 题目/<n>/output 下，崩溃后从下一个未完成的阶段继续。"""
+    from gen_taskjson import build_task, problem_paths
+    out_dir, image_path = problem_paths(record["problem_dir"])
+    task_path = os.path.join(out_dir, "render_task.json")
+
+    if stage == "task":
+        build_task(out_dir, image_path)
+    elif stage == "audio":
+        from batch_render import prefetch_all
+        prefetch_all([task_path])
+    elif stage == "video":
+        from batch_render import render_task
+        result = render_task(task_path, record["quality"])
+        if result["status"] != "ok":
+            raise RuntimeError(result["error"])
+        record["video"] = result["video"]
+
+
+def process_job(record, node):
+    record_path = _path("jobs", f"{record['id']}.json")
+    record.update(status="running", node=node, attempts=record["attempts"] + 1, updated=time.time())
+    _write_json(record_path, record)
+
+    heartbeat = Heartbeat(record["id"], node)
+    heartbeat.start()
+    start = time.perf_counter()
+    error = None
+    try:
+        for stage in STAGES:
+            if stage in record["stages_done"]:
+                continue
+            run_stage(stage, record)
+            if heartbeat.lost:
+                return  # 租约已被别人接手，本节点的结果作废，不再写记录
+            record["stages_done"].append(stage)
+            record["updated"] = time.time()
+            _write_json(record_path, record)
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        heartbeat.stop()
+
+    if heartbeat.lost:
+        return
+    if error is None:
+        record["status"] = "done"
+    else:
+        record["status"] = "failed" if record["attempts"] >= MAX_ATTEMPTS else "pending"
+    record["history"].append({"node": node, "attempt": record["attempts"], "ok": error is None,
+                              "wall_time": round(time.perf_counter() - start, 2),
+                              "error": error and error.strip().splitlines()[-1]})
+    record["updated"] = time.time()
+    _write_json(record_path, record)
+    release_lease(record["id"])
+
+
+def take_over(record, node):
+    """
+    接手租约过期的 running 任务：上一次执行没有正常收尾 (worker 被 OOM / 段错误杀掉，或节点失联)，
+    异常分支里的次数检查不会执行，这里补记一次失败；次数用完就标记 failed，不再无限重领。返回是否继续执行。
+    """
+    record["history"].append({"node": record.get("node"), "attempt": record["attempts"], "ok": False,
+                              "wall_time": None, "error": f"租约过期，由 {node} 接手"})
+    record["updated"] = time.time()
+    if record["attempts"] < MAX_ATTEMPTS:
+        return True
+    record["status"] = "failed"
+    _write_json(_path("jobs", f"{record['id']}.json"), record)
+    print(f"❌ 题目 {record['id']} 已执行 {record['attempts']} 次仍未完成，标记为 failed")
+    return False
+
+
+def work_loop(node=None):
+    """不停领取可执行的任务 (pending，或 running 但租约已过期)，直到没有剩余任务。"""
+    node = node or node_name()
+    processed = 0
+    while True:
+        open_jobs = [r for r in load_records() if r["status"] in ("pending", "running")]
+        if not open_jobs:
+            return processed
+        claimed = False
+        for record in open_jobs:
+            if not acquire_lease(record["id"], node):
+                continue
+            # 拿到租约后重新读一次记录，防止期间已被别的节点完成
+            record = _read_json(_path("jobs", f"{record['id']}.json"))
+            if record["status"] in ("done", "failed"):
+                release_lease(record["id"])
+                continue
+            if record["status"] == "running" and not take_over(record, node):
+                release_lease(record["id"])
+                continue
+            print(f"🎬 [{node}] 题目 {record['id']} (第 {record['attempts'] + 1} 次)")
+            process_job(record, node)
+            processed += 1
+            claimed = True
+            break
+        if not claimed:
+            # 剩下的都在别的节点手上，等它们完成或租约过期
+            time.sleep(HEARTBEAT_SECONDS)
+
+
+def _work_process(index):
+    return work_loop(f"{node_name()}#{index}")
+
+
+def print_status():
+    records = load_records()
+    counts = {}
+    for r in records:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print("📊 " + "  ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+    for r in records:
+        if r["status"] in ("running", "failed"):
+            last = r["history"][-1] if r["history"] else {}
+            print(f"   {r['status']:8s} 题目 {r['id']}  节点 {r.get('node')}  {last.get('error') or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共享文件系统上的分布式渲染队列")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_init = sub.add_parser("init", help="生成任务清单")
+    p_init.add_argument("--root", default="../题目")
+    p_init.add_argument("--quality", default=DEFAULT_QUALITY)
+    p_work = sub.add_parser("work", help="在本机领取并执行任务")
+    p_work.add_argument("--workers", type=int, default=1, help="本机同时执行的任务数")
+    sub.add_parser("status", help="查看进度")
+    args = parser.parse_args()
+
+    if args.command == "init":
+        print(f"✅ 清单共 {len(init_queue(args.root, args.quality))} 个题目: {os.path.abspath(QUEUE_DIR)}")
+    elif args.command == "work":
+        import svg_cache
+        svg_cache.evict()
+        if args.workers <= 1:
+            total = work_loop()
+        else:
+            with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+                total = sum(pool.map(_work_process, range(args.workers)))
+        print(f"✅ 本机共完成 {total} 个任务")
+    else:
+        print_status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# ladder.py
+# 多分辨率输出：UGPScene 只按最高一档渲染一次 (配音、公式、光栅化都只做一次)，
+# 其余各档从这份母版并行缩放转码，最后写一份 manifest 列出每一档的文件和大小。
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from manim.constants import QUALITIES
+from renderer import TASK_FILE, render_task_file
+from video_tools import count_frames, transcode_scaled
+
+# ================= Configuration =================
+# 档位 -> 对应的 manim 画质 (分辨率和帧率都跟单独渲染这一档时一致) 和 crf
+RENDITIONS = {
+    "480p": {"quality": "low_quality", "crf": 24},
+    "720p": {"quality": "medium_quality", "crf": 23},
+    "1080p": {"quality": "high_quality", "crf": 22},
+    "2160p": {"quality": "fourk_quality", "crf": 22},
+}
+DEFAULT_LADDER = ("480p", "720p", "1080p")
+LADDER_DIR = "ladder"
+MANIFEST_NAME = "manifest.json"
+
+
+def rendition_info(name):
+    quality = QUALITIES[RENDITIONS[name]["quality"]]
+    return quality["pixel_width"], quality["pixel_height"], quality["frame_rate"]
+
+
+def _transcode(master_path, output_path, name, master_rate, threads):
+    width, height, frame_rate = rendition_info(name)
+    start = time.perf_counter()
+    # 母版帧率是各档的整数倍 (60 / 30 / 15)，不同时只降帧不插帧
+    transcode_scaled(master_path, output_path, width, height, RENDITIONS[name]["crf"],
+                     frame_rate=frame_rate if frame_rate != master_rate else None, threads=threads)
+    return time.perf_counter() - start
+
+
+def render_ladder(task_path, out_dir, names=DEFAULT_LADDER, workers=None):
+    """渲染一次最高档，转码出其余各档。返回 manifest (同时写到 out_dir/manifest.json)。"""
+    names = sorted(set(names), key=lambda n: rendition_info(n)[1])
+    top = names[-1]
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, f"lesson_{name}.mp4") for name in names}
+
+    start = time.perf_counter()
+    render_task_file(task_path, paths[top], RENDITIONS[top]["quality"])
+    timings = {top: time.perf_counter() - start}
+    print(f"🎬 母版 {top} 渲染完成 ({timings[top]:.1f}s)，开始转码 {len(names) - 1} 档 ...")
+
+    # 转码都在 ffmpeg 子进程里跑，线程池只负责等待；CPU 按档平分给各个 ffmpeg
+    lower = names[:-1]
+    if lower:
+        workers = max(1, min(workers or len(lower), len(lower)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        master_rate = rendition_info(top)[2]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(_transcode, paths[top], paths[name], name, master_rate, threads)
+                       for name in lower}
+            for name, future in futures.items():
+                timings[name] = future.result()
+                print(f"✅ {name}: {paths[name]} ({timings[name]:.1f}s)")
+
+    renditions = []
+    for name in names:
+        width, height, frame_rate = rendition_info(name)
+        size = os.path.getsize(paths[name])
+        duration = count_frames(paths[name]) / frame_rate
+        renditions.append({
+            "name": name,
+            "path": os.path.basename(paths[name]),
+            "width": width,
+            "height": height,
+            "frame_rate": frame_rate,
+            "duration": round(duration, 3),
+            "bytes": size,
+            "bitrate_kbps": round(size * 8 / duration / 1000, 1) if duration else None,
+            "source": "render" if name == top else "transcode",
+            "seconds": round(timings[name], 2),
+        })
+    manifest = {
+        "task": os.path.abspath(task_path),
+        "master": top,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "renditions": renditions,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="渲染一次，输出多分辨率版本")
+    parser.add_argument("task", nargs="?", default=TASK_FILE, help="render_task.json 路径")
+    parser.add_argument("--renditions", default=",".join(DEFAULT_LADDER),
+                        help=f"逗号分隔，可选 {', '.join(RENDITIONS)}")
+    parser.add_argument("--output-dir", help=f"输出目录 (默认 与任务同目录的 {LADDER_DIR}/)")
+    parser.add_argument("--workers", type=int, help="同时转码的档数 (默认 全部同时)")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.renditions.split(",") if n.strip()]
+    unknown = [n for n in names if n not in RENDITIONS]
+    if unknown or not names:
+        parser.error(f"未知档位: {', '.join(unknown) or '(空)'}")
+
+    out_dir = args.output_dir or os.path.join(os.path.dirname(os.path.abspath(args.task)), LADDER_DIR)
+    start = time.perf_counter()
+    manifest = render_ladder(args.task, out_dir, names, args.workers)
+    print("-" * 30)
+    for r in manifest["renditions"]:
+        print(f"   {r['name']:>6}  {r['width']}x{r['height']}@{r['frame_rate']}  "
+              f"{r['bytes'] / 1024 ** 2:.1f}MB  {r['bitrate_kbps']}kbps  ({r['source']})")
+    print(f"📄 manifest: {os.path.join(out_dir, MANIFEST_NAME)}  (总耗时 {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,36 @@
-from manim import *
-
-UGP_CONFIG = {
-    # --- 1. 全局配色 ---
-    "camera_bg_color": "#F0F2F5",   # 背景
-    "text_main_color": "#2C3E50",   # 标题文字
-    "math_color": "#000000",        # 数学公式
-    "drawing_color": "#E74C3C",     # 几何图形 (默认红)
-    "highlight_color": "#F1C40F",   # 高亮色 (你的JSON里用了)
-    "marker_color": "#2980B9",      # 标记色 (你的JSON里 ADD_MARKER 用了)
-    
-    # --- 2. 布局比例 ---
-    "layout_header_h": 0.15,
-    "layout_footer_h": 0.10,
-    "layout_split_ratio": 0.45,
-
-    # --- 3. 字体 ---
-    "font_size_header": 24,
-    "font_size_math": 28,
-    "font_size_subtitle": 24,
-
-    # --- 4. 间距 ---
-    "math_line_buff": 0.5,
+UGP_CONFIG = {
+    # --- 1. 全局配色 ---
+    "camera_bg_color": "#F0F2F5",   # 背景
+    "text_main_color": "#2C3E50",   # 标题文字
+    "math_color": "#000000",        # 数学公式
+    "drawing_color": "#E74C3C",     # 几何图形 (默认红)
+    "highlight_color": "#F1C40F",   # 高亮色 (你的JSON里用了)
+    "marker_color": "#2980B9",      # 标记色 (你的JSON里 ADD_MARKER 用了)
+    
+    # --- 2. 布局比例 ---
+    "layout_header_h": 0.15,
+    "layout_footer_h": 0.10,
+    "layout_split_ratio": 0.45,
+
+    # --- 3. 字体 ---
+    "font_size_header": 24,
+    "font_size_math": 28,
+    "font_size_subtitle": 24,
+    "text_font": "",                # Text 用的字体 ("" = Pango 默认)，排版时按它量字宽
+
+    # --- 4. 间距 ---
+    "math_line_buff": 0.5,
+    "solution_bottom_margin": 0.3,  # 解题区底部留白，公式超出后整列上滚
+    "min_step_time": 1.5,           # 没有配音的步骤最少停留的秒数
+
+    # --- 5. 渲染 ---
+    "static_layer": True,           # 已定型对象缓存成背景图，每次 play 不再重新光栅化
+    "subtitle_workers": 4,          # 字幕预渲染的进程数 (0 = 全部在主进程里建)
+    "static_hold": True,            # 动画按自然时长播放，之后 (及无动作的步骤) 的静止画面只渲染一帧、直接编码成静止片段
+
+    # --- 6. 配音 ---
+    "tts_engine": "gtts",           # gtts / edge / stub (环境变量 UGP_TTS_ENGINE 可覆盖)
+    "tts_lang": "en",
+    "tts_voice": "",                # edge 引擎的音色，如 zh-CN-YunxiNeural
+    "tts_concurrency": 4,           # 预取时同时在途的合成请求数
 }
\ No newline at end of file
@@ -0,0 +1,114 @@
+# mp3_info.py
+# 只解析 MP3 帧头计算时长，不解码音频数据
+import struct
+
+# 比特率表 (kbps)，按 (版本, 层) 索引
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+_VERSIONS = {0b00: 2.5, 0b10: 2, 0b11: 1}
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+
+def _parse_header(b):
+    """解析 4 字节帧头，返回 (帧长字节, 每帧采样数, 采样率, 版本, 单声道) 或 None。"""
+    if b[0] != 0xFF or (b[1] & 0xE0) != 0xE0:
+        return None
+    version = _VERSIONS.get((b[1] >> 3) & 0b11)
+    layer = _LAYERS.get((b[1] >> 1) & 0b11)
+    bitrate_idx = b[2] >> 4
+    rate_idx = (b[2] >> 2) & 0b11
+    if version is None or layer is None or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_idx]
+    padding = (b[2] >> 1) & 1
+    mono = (b[3] >> 6) == 0b11
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    return length, samples, sample_rate, version, mono
+
+
+def _skip_id3v2(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _find_frame(data, pos):
+    """从 pos 开始找到第一个合法帧头 (要求下一帧也能接上，避免误判)。"""
+    while pos + 4 <= len(data):
+        pos = data.find(b"\xFF", pos)
+        if pos < 0 or pos + 4 > len(data):
+            return -1
+        header = _parse_header(data[pos:pos + 4])
+        if header:
+            nxt = pos + header[0]
+            if nxt + 4 > len(data) or _parse_header(data[nxt:nxt + 4]):
+                return pos
+        pos += 1
+    return -1
+
+
+def _vbr_frame_count(data, pos, header):
+    """读 Xing/Info 或 VBRI 头里记录的总帧数，没有则返回 None。"""
+    _, _, _, version, mono = header
+    if version == 1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            return struct.unpack(">I", data[xing + 8:xing + 12])[0]
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        return struct.unpack(">I", data[vbri + 14:vbri + 18])[0]
+    return None
+
+
+def mp3_duration(path):
+    """返回 mp3 文件的时长 (秒)。优先用 VBR 头里的帧数，否则逐帧累加帧头信息。"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    pos = _find_frame(data, _skip_id3v2(data))
+    if pos < 0:
+        raise ValueError(f"不是合法的 MP3 文件: {path}")
+
+    first = _parse_header(data[pos:pos + 4])
+    frames = _vbr_frame_count(data, pos, first)
+    if frames is not None:
+        return frames * first[1] / first[2]
+
+    seconds = 0.0
+    while pos + 4 <= len(data):
+        header = _parse_header(data[pos:pos + 4])
+        if header is None:
+            # 尾部的 ID3v1 / APE 标签或垃圾数据，重新同步一次
+            pos = _find_frame(data, pos + 1)
+            if pos < 0:
+                break
+            continue
+        length, samples, sample_rate, _, _ = header
+        seconds += samples / sample_rate
+        pos += length
+    return seconds
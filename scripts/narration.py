@@ -0,0 +1,113 @@
+# narration.py
+# 整课旁白预混成一条音轨：按每一步的时长把配音依次流式写进一个 WAV (内存占用恒定)，
+# 渲染出的无声视频最后和它一次性 mux。不再逐步 add_sound 叠加到 manim 的内存音轨上。
+import math
+import os
+import subprocess
+import tempfile
+import wave
+import tts_cache
+import tts_prefetch
+from layout_config import UGP_CONFIG
+from profiler import TRACER
+from video_tools import FFMPEG, mux_audio
+
+SAMPLE_RATE = 48000
+_CHUNK = 1 << 16
+
+
+def step_frames(voice_seconds, frame_rate):
+    """一步的帧数：有配音 = 音频真实时长，否则 min_step_time，都向上取整到整帧。"""
+    seconds = UGP_CONFIG["min_step_time"] if voice_seconds is None else voice_seconds
+    return max(1, math.ceil(seconds * frame_rate - 1e-6))
+
+
+def frames_run_time(frames, frame_rate):
+    """
+    让 manim 正好写出 frames 帧的 run_time。manim 按 np.arange(0, run_time, 1 / fps) 取帧时刻，
+    run_time 恰好是 frames / fps 时浮点误差会让大约 8% 的帧数多出一帧 (23、31、46、62 ...)，
+    每次 play / wait 多一帧，画面就比旁白越走越快。少半帧就不会落在边界上。
+    """
+    return (frames - 0.5) / frame_rate
+
+
+def frozen_run_time(frames, frame_rate):
+    """
+    静态 wait (没有 updater，manim 直接重复同一帧) 正好写出 frames 帧的时长。
+    这条路径写 int(duration / (1 / fps)) 帧，是向下取整：frames_run_time 会少一帧，frames / fps 也有少一帧的时候，多半帧才稳。
+    """
+    return (frames + 0.5) / frame_rate
+
+
+def step_plan(task_data, frame_rate):
+    """
+    每一步的 {"start", "run_time", "frames", "voice"}。顺带把台词都合成进缓存。
+    renderer 按它决定每步的 run_time，旁白按它决定每段配音的起点，两边用的是同一份时间轴。
+    """
+    engine = os.environ.get("UGP_TTS_ENGINE", UGP_CONFIG["tts_engine"])
+    paths = tts_prefetch.prefetch([task_data], engine, lang=UGP_CONFIG["tts_lang"],
+                                  voice=UGP_CONFIG["tts_voice"], concurrency=UGP_CONFIG["tts_concurrency"])
+    plan, elapsed = [], 0
+    for step in task_data["timeline"]:
+        text = step.get("voice", "")
+        voice = paths[text] if text else None
+        frames = step_frames(tts_cache.clip_duration(voice) if voice else None, frame_rate)
+        plan.append({"start": elapsed / frame_rate, "run_time": frames / frame_rate, "frames": frames, "voice": voice})
+        elapsed += frames
+    return plan
+
+
+def _decode_into(out, mp3_path, max_samples, sample_rate):
+    """把一段配音解码成 16bit 单声道 PCM 流式写入 out，最多 max_samples 个采样。返回写入的采样数。"""
+    cmd = [FFMPEG, "-hide_banner", "-loglevel", "error", "-i", mp3_path,
+           "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-"]
+    written = 0
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        while written < max_samples:
+            chunk = proc.stdout.read(min(_CHUNK, (max_samples - written) * 2))
+            if not chunk:
+                break
+            out.writeframesraw(chunk)
+            written += len(chunk) // 2
+        proc.stdout.close()
+        proc.kill()
+    return written
+
+
+@TRACER.traced("write_narration", "audio")
+def write_narration(plan, frame_rate, wav_path, sample_rate=SAMPLE_RATE, first_frame=0):
+    """
+    按 plan 把各步配音首尾相接写成一个 WAV：每步从自己的起始帧开始，配音之后补静音到这一步结束。
+    采样边界按累计帧数换算，长课也不会累积误差。
+    只写其中一段时 first_frame 传这段在整课里的起始帧，采样边界和整条旁白完全一致 (见 hls_render.py)。
+    """
+    silence = b"\0" * (_CHUNK * 2)
+    with wave.open(wav_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        frames_done = first_frame
+        for step in plan:
+            begin = round(frames_done * sample_rate / frame_rate)
+            frames_done += step["frames"]
+            n_samples = round(frames_done * sample_rate / frame_rate) - begin
+            written = _decode_into(out, step["voice"], n_samples, sample_rate) if step["voice"] else 0
+            remaining = n_samples - written
+            while remaining > 0:
+                n = min(remaining, _CHUNK)
+                out.writeframesraw(silence[:n * 2])
+                remaining -= n
+    return wav_path
+
+
+def add_narration(plan, frame_rate, video_path, output_path):
+    """把 plan 对应的整条旁白 mux 进无声视频 video_path，写到 output_path (视频流不重新编码)。"""
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, wav_path = tempfile.mkstemp(suffix=".wav", prefix=".narration-", dir=out_dir)
+    os.close(fd)
+    try:
+        write_narration(plan, frame_rate, wav_path)
+        mux_audio(video_path, wav_path, output_path)
+    finally:
+        os.remove(wav_path)
+    return output_path
@@ -0,0 +1,93 @@
+# parallel_render.py
+# 并行分段渲染：把一个题目的时间轴切成几组连续的步骤，各组在独立进程里同时渲染，最后 stream copy 拼接并配上整条旁白
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from manim.constants import QUALITIES
+from narration import add_narration, step_plan
+from renderer import TASK_FILE, render_task_file
+from video_tools import concat_copy
+
+DEFAULT_QUALITY = "low_quality"
+
+
+def plan_groups(costs, n_groups):
+    """
+    把 costs 切成不超过 n_groups 段连续区间，使最重的一段尽量轻。返回 [(start, end), ...]。
+    costs 为空 (没有步骤的任务) 时返回 [(0, 0)]：一组，只渲染题目页。
+    """
+    def split(capacity):
+        groups, start, load = [], 0, 0.0
+        for i, cost in enumerate(costs):
+            if load + cost > capacity and i > start:
+                groups.append((start, i))
+                start, load = i, 0.0
+            load += cost
+        groups.append((start, len(costs)))
+        return groups
+
+    # 二分最重一段的上限
+    lo, hi = max(costs, default=0), sum(costs)
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if len(split(mid)) <= n_groups:
+            hi = mid
+        else:
+            lo = mid
+    return split(hi)
+
+
+def _render_group(task_path, group, output_path, quality):
+    start = time.perf_counter()
+    render_task_file(task_path, output_path, quality, step_range=group)
+    return time.perf_counter() - start
+
+
+def render_parallel(task_path, output_path, workers, quality=DEFAULT_QUALITY):
+    with open(task_path, "r", encoding="utf-8") as f:
+        task_data = json.load(f)
+
+    # 规划阶段：不光栅化任何画面，只按和 renderer 相同的规则排出每一步的时长。
+    # 每个分组开头的场景状态由 worker 自己跳过之前的步骤得到 (skip_animations，不写帧)。
+    frame_rate = QUALITIES[quality]["frame_rate"]
+    plan = step_plan(task_data, frame_rate)
+    times = [step["run_time"] for step in plan]
+    groups = plan_groups(times, workers)
+    print(f"🧩 {len(times)} 步切成 {len(groups)} 组: " +
+          ", ".join(f"[{s}-{e - 1}] {sum(times[s:e]):.1f}s" for s, e in groups))
+
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(prefix=".ugp-groups-", dir=out_dir) as work_dir:
+        parts = [os.path.join(work_dir, f"group_{s}_{e}.mp4") for s, e in groups]
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(groups), mp_context=ctx) as pool:
+            futures = [pool.submit(_render_group, task_path, g, p, quality) for g, p in zip(groups, parts)]
+            elapsed = [f.result() for f in futures]
+        # 各组都是无声的：拼接后按整课时间轴配上一条旁白
+        video_path = concat_copy(parts, os.path.join(work_dir, "video.mp4"))
+        add_narration(plan, frame_rate, video_path, output_path)
+    return groups, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行分段渲染一个题目")
+    parser.add_argument("task", nargs="?", default=TASK_FILE, help="render_task.json 路径")
+    parser.add_argument("--output", help="输出视频 (默认 与任务同目录的 lesson.mp4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--quality", default=DEFAULT_QUALITY)
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.task)), "lesson.mp4")
+    start = time.perf_counter()
+    groups, elapsed = render_parallel(args.task, output, max(1, args.workers), args.quality)
+    print(f"✅ 完成: {output}")
+    print(f"   总耗时 {time.perf_counter() - start:.1f}s，最慢一组 {max(elapsed):.1f}s，各组合计 {math.fsum(elapsed):.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# profiler.py
+# 可选的性能埋点：记录各阶段 / 各步骤的 wall time、CPU time、帧数、缓存命中和峰值内存，
+# 输出 Chrome trace (chrome://tracing 或 ui.perfetto.dev 打开) 和汇总表。
+#
+# 设置环境变量 UGP_PROFILE 开启：
+#   UGP_PROFILE=trace.json   写到这个文件
+#   UGP_PROFILE=traces/      每个任务写一份 traces/<题号>.trace.json
+import atexit
+import functools
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _peak_rss_mb():
+    # Linux 上 ru_maxrss 单位是 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Tracer:
+    def __init__(self, target):
+        self.target = target
+        self.enabled = bool(target)
+        self.reset()
+
+    def reset(self):
+        self.events = []
+        self.counters = {}
+        self.written = False
+
+    @contextmanager
+    def span(self, name, cat="ugp", **args):
+        """记录一段耗时。yield 一个 dict，可以往里补充参数 (例如帧数)。"""
+        if not self.enabled:
+            yield {}
+            return
+        extra = dict(args)
+        start_us = time.perf_counter_ns() // 1000
+        start_cpu = time.process_time()
+        try:
+            yield extra
+        finally:
+            extra["cpu_ms"] = round((time.process_time() - start_cpu) * 1000, 3)
+            extra["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+            self.events.append({
+                "name": name, "cat": cat, "ph": "X",
+                "ts": start_us, "dur": time.perf_counter_ns() // 1000 - start_us,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": extra,
+            })
+
+    def traced(self, name=None, cat="ugp"):
+        """装饰器版本的 span。"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name or fn.__qualname__, cat):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """按 span 名字汇总：调用次数、总 wall/CPU 时间、帧数；外加计数器和峰值内存。"""
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault(event["name"], {"name": event["name"], "calls": 0, "wall_s": 0.0,
+                                                  "cpu_s": 0.0, "frames": 0})
+            row["calls"] += 1
+            row["wall_s"] += event["dur"] / 1e6
+            row["cpu_s"] += event["args"].get("cpu_ms", 0) / 1000
+            row["frames"] += event["args"].get("frames", 0)
+        table = sorted(rows.values(), key=lambda r: -r["wall_s"])
+        for row in table:
+            row["wall_s"] = round(row["wall_s"], 3)
+            row["cpu_s"] = round(row["cpu_s"], 3)
+        return {"spans": table, "counters": dict(self.counters), "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+    def write(self, name="trace"):
+        """写出 <name>.trace.json 和汇总 <name>.summary.json / .summary.txt。返回 trace 路径。"""
+        if not self.enabled or not self.events:
+            return None
+        if self.target.endswith(".json"):
+            path = self.target
+        else:
+            os.makedirs(self.target, exist_ok=True)
+            path = os.path.join(self.target, f"{name}.trace.json")
+        counters = [{"name": k, "ph": "C", "ts": self.events[-1]["ts"], "pid": os.getpid(), "args": {k: v}}
+                    for k, v in self.counters.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events + counters, "displayTimeUnit": "ms"}, f)
+        summary = self.summary()
+        base = os.path.splitext(path)[0]
+        if base.endswith(".trace"):
+            base = base[:-len(".trace")]
+        with open(base + ".summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        with open(base + ".summary.txt", "w", encoding="utf-8") as f:
+            f.write(format_summary(summary) + "\n")
+        self.written = True
+        return path
+
+
+def merge_summaries(summaries):
+    """把多个任务的 summary 合成一份 (批量渲染的总表)。峰值内存取最大值。"""
+    rows, counters, peak = {}, {}, 0.0
+    for summary in summaries:
+        for row in summary["spans"]:
+            total = rows.setdefault(row["name"], {"name": row["name"], "calls": 0, "wall_s": 0.0,
+                                                  "cpu_s": 0.0, "frames": 0})
+            for k in ("calls", "wall_s", "cpu_s", "frames"):
+                total[k] += row[k]
+        for name, value in summary["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+        peak = max(peak, summary["peak_rss_mb"])
+    table = sorted(rows.values(), key=lambda r: -r["wall_s"])
+    for row in table:
+        row["wall_s"] = round(row["wall_s"], 3)
+        row["cpu_s"] = round(row["cpu_s"], 3)
+    return {"spans": table, "counters": counters, "peak_rss_mb": peak}
+
+
+def format_summary(summary):
+    """summary -> 文本表格。"""
+    lines = [f"{'span':32s} {'calls':>6s} {'wall(s)':>9s} {'cpu(s)':>9s} {'frames':>7s}"]
+    for row in summary["spans"]:
+        lines.append(f"{row['name'][:32]:32s} {row['calls']:6d} {row['wall_s']:9.3f} {row['cpu_s']:9.3f} {row['frames']:7d}")
+    for name, value in sorted(summary["counters"].items()):
+        lines.append(f"  {name}: {value}")
+    lines.append(f"  peak RSS: {summary['peak_rss_mb']} MB")
+    return "\n".join(lines)
+
+
+TRACER = Tracer(os.environ.get("UGP_PROFILE", ""))
+
+
+@atexit.register
+def _flush():
+    # 单独运行的前处理脚本 (gen_taskjson / tts_prefetch ...) 退出时也写一份
+    if TRACER.enabled and not TRACER.written:
+        TRACER.write(f"pid{os.getpid()}")
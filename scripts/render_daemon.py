@@ -0,0 +1,115 @@
+# render_daemon.py
+# 常驻渲染进程：manim / 字体 / 各种缓存只初始化一次，之后从 spool 目录里不断领取渲染任务
+#
+#   python render_daemon.py serve                         # 启动 (可以同时开多个，共用一个 spool)
+#   python render_daemon.py submit ../题目/3/output/render_task.json
+import argparse
+import json
+import os
+import signal
+import time
+import uuid
+
+# ================= Configuration =================
+SPOOL_DIR = os.environ.get("UGP_SPOOL", "../spool")
+POLL_INTERVAL = 0.5
+DEFAULT_QUALITY = "low_quality"
+
+# 任务文件在这几个子目录之间流转：incoming -> working -> done / failed
+_STATES = ("incoming", "working", "done", "failed")
+
+
+def spool_path(state, name=""):
+    return os.path.join(SPOOL_DIR, state, name)
+
+
+def submit(task_path, quality=DEFAULT_QUALITY):
+    """提交一个渲染任务。先写临时文件再 rename 进 incoming，daemon 永远看不到写了一半的任务。"""
+    for state in _STATES:
+        os.makedirs(spool_path(state), exist_ok=True)
+    job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    job = {"id": job_id, "task": os.path.abspath(task_path), "quality": quality, "submitted": time.time()}
+    tmp_path = spool_path("incoming", f".{job_id}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_path, spool_path("incoming", f"{job_id}.json"))
+    return job_id
+
+
+def claim_next():
+    """领取最早提交的任务：rename 到 working 是原子的，多个 daemon 抢同一个任务只有一个能成功。"""
+    names = sorted(n for n in os.listdir(spool_path("incoming")) if n.endswith(".json"))
+    for name in names:
+        try:
+            os.rename(spool_path("incoming", name), spool_path("working", name))
+        except FileNotFoundError:
+            continue  # 被别的 daemon 抢走了
+        with open(spool_path("working", name), "r", encoding="utf-8") as f:
+            return name, json.load(f)
+    return None, None
+
+
+def warm_up():
+    """一次性付清启动成本：导入 manim、扫描字体、挂上共享 svg 缓存。"""
+    start = time.perf_counter()
+    import manimpango
+    import renderer  # noqa: F401  (连带导入 manim、tts、tex 相关模块)
+    import svg_cache
+    manimpango.list_fonts()
+    svg_cache.install()
+    svg_cache.evict()
+    print(f"🔥 预热完成 ({time.perf_counter() - start:.1f}s)，等待任务: {os.path.abspath(SPOOL_DIR)}")
+
+
+def serve(once=False):
+    from batch_render import render_task
+
+    for state in _STATES:
+        os.makedirs(spool_path(state), exist_ok=True)
+    warm_up()
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+    while not stopping:
+        name, job = claim_next()
+        if job is None:
+            if once:
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        print(f"🎬 [{job['id']}] {job['task']}")
+        record = render_task(job["task"], job.get("quality", DEFAULT_QUALITY))
+        record.update(id=job["id"], submitted=job["submitted"], finished=time.time(), pid=os.getpid())
+
+        state = "done" if record["status"] == "ok" else "failed"
+        with open(spool_path(state, name), "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        os.remove(spool_path("working", name))
+        mark = "✅" if state == "done" else "❌"
+        print(f"{mark} [{job['id']}] {record['wall_time']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻渲染进程")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="启动 daemon")
+    p_serve.add_argument("--once", action="store_true", help="处理完当前积压的任务就退出")
+    p_submit = sub.add_parser("submit", help="提交任务")
+    p_submit.add_argument("tasks", nargs="+", help="render_task.json 路径")
+    p_submit.add_argument("--quality", default=DEFAULT_QUALITY)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            serve(once=args.once)
+        except KeyboardInterrupt:
+            pass
+    else:
+        for task in args.tasks:
+            print(f"📥 已提交: {submit(task, args.quality)}  {task}")
+
+
+if __name__ == "__main__":
+    main()
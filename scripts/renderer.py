@@ -1,305 +1,587 @@
-from manim import *
-import json
-import os
-import numpy as np
-import textwrap  # <--- 新增：用于文本自动换行
-from gtts import gTTS
-from layout_config import UGP_CONFIG
-
-TASK_FILE = "../题目/1/output/render_task.json"
-
-class UGPScene(Scene):
-    def construct(self):
-        self.camera.background_color = UGP_CONFIG["camera_bg_color"]
-        self.load_data()
-        self.setup_layout_regions()
-        
-        # 1. 显示题目 (已修复溢出问题)
-        self.show_problem_statement()
-
-        # 2. 计算几何变换 (保留了抗扁平逻辑)
-        self.calculate_figure_transform()
-
-        # 3. 执行剧本
-        self.execute_timeline()
-
-    # =======================================================
-    # 🏗️ 布局系统
-    # =======================================================
-    def setup_layout_regions(self):
-        h = config.frame_height
-        w = config.frame_width
-        
-        header_h = h * UGP_CONFIG["layout_header_h"]
-        footer_h = h * UGP_CONFIG["layout_footer_h"]
-        middle_h = h - header_h - footer_h
-        left_w = w * UGP_CONFIG["layout_split_ratio"]
-        right_w = w - left_w
-        
-        # Header
-        self.zone_header = {"center": UP * (h/2 - header_h/2), "width": w, "height": header_h}
-        # Footer
-        self.zone_footer = {"center": DOWN * (h/2 - footer_h/2), "width": w, "height": footer_h}
-        
-        center_y = (self.zone_header["center"][1] - header_h/2) - middle_h/2
-        
-        # Solution (Left)
-        self.zone_solution = {
-            "center": np.array([-w/2 + left_w/2, center_y, 0]),
-            "width": left_w, "height": middle_h,
-            "cursor": np.array([-w/2 + 0.5, center_y + middle_h/2 - 0.8, 0])
-        }
-        # Figure (Right)
-        self.zone_figure = {
-            "center": np.array([w/2 - right_w/2, center_y, 0]),
-            "width": right_w, "height": middle_h
-        }
-
-    # =======================================================
-    # 📝 核心修复：题目显示 (自动换行 + 自动缩放)
-    # =======================================================
-    def show_problem_statement(self):
-        raw_text = self.task_data["meta"].get("problem_text", "Geometry Problem")
-        
-        # 1. 自动换行算法
-        # 估算：屏幕宽度约 14 单位，每行约容纳 60-70 个英文字符或 30-35 个中文字符
-        # 这里设置为 50 比较安全
-        wrapped_text_list = textwrap.wrap(raw_text, width=50)
-        formatted_text = "\n".join(wrapped_text_list)
-        
-        # 2. 创建文本对象
-        label = Text(
-            formatted_text, 
-            font_size=UGP_CONFIG["font_size_header"], 
-            color=UGP_CONFIG["text_main_color"],
-            line_spacing=1.2,
-            weight=BOLD
-        )
-        
-        # 3. 碰撞检测与自动缩放 (Auto-Fit)
-        # 获取 Header 区域的最大允许宽高 (留 10% 边距)
-        max_w = self.zone_header["width"] * 0.9
-        max_h = self.zone_header["height"] * 0.9
-        
-        # 如果太宽，缩放
-        if label.width > max_w:
-            label.scale(max_w / label.width)
-            
-        # 如果太高 (行数太多)，继续缩放
-        if label.height > max_h:
-            label.scale(max_h / label.height)
-            
-        label.move_to(self.zone_header["center"])
-        self.add(label)
-
-    # =======================================================
-    # 📐 抗扁平与自动构图
-    # =======================================================
-    def calculate_figure_transform(self):
-        coords = list(self.task_data["layout_info"]["relative_layout"].values())
-        if not coords: 
-            self.fig_scale = 1.0; self.fig_rel_center = np.array([0.5, 0.5, 0]); return
-
-        # 获取真实长宽比
-        self.img_aspect = self.task_data["layout_info"].get("aspect_ratio", 1.77)
-
-        # 还原物理坐标以计算包围盒
-        phys_coords = []
-        for p in coords:
-            phys_coords.append([p[0] * self.img_aspect, p[1]])
-        
-        arr = np.array(phys_coords)
-        min_x, min_y = np.min(arr, axis=0)
-        max_x, max_y = np.max(arr, axis=0)
-        
-        self.phys_center = np.array([(min_x + max_x)/2.0, (min_y + max_y)/2.0, 0])
-        
-        span_x = max(max_x - min_x, 0.2)
-        span_y = max(max_y - min_y, 0.2)
-        
-        # 缩放倍率计算
-        target_w = self.zone_figure["width"] * 0.75
-        target_h = self.zone_figure["height"] * 0.75
-        
-        # 基准单位 8.0
-        scale_x = target_w / (span_x * 8.0)
-        scale_y = target_h / (span_y * 8.0)
-        
-        self.fig_scale = min(scale_x, scale_y) * 8.0
-
-    def get_coords(self, pid):
-        if pid not in self.task_data["layout_info"]["relative_layout"]:
-            return self.zone_figure["center"]
-        rel_pos = self.task_data["layout_info"]["relative_layout"][pid]
-        
-        # 物理坐标还原
-        phys_x = rel_pos[0] * self.img_aspect
-        phys_y = rel_pos[1]
-        
-        dx = phys_x - self.phys_center[0]
-        dy = phys_y - self.phys_center[1]
-        
-        # 缩放、翻转Y、平移
-        manim_dx = dx * self.fig_scale
-        manim_dy = -dy * self.fig_scale 
-        
-        return self.zone_figure["center"] + np.array([manim_dx, manim_dy, 0])
-
-    # =======================================================
-    # 🎬 执行与动作解析
-    # =======================================================
-    def load_data(self):
-        if not os.path.exists(TASK_FILE): raise FileNotFoundError(f"Missing {TASK_FILE}")
-        with open(TASK_FILE, "r", encoding="utf-8") as f: self.task_data = json.load(f)
-        self.ugp_objects = {}; self.math_lines = [] 
-
-    def execute_timeline(self):
-        self.subtitle_obj = Text("", font_size=UGP_CONFIG["font_size_subtitle"]).move_to(self.zone_footer["center"])
-        self.add(self.subtitle_obj)
-
-        for i, step in enumerate(self.task_data["timeline"]):
-            voice_text = step.get("voice", "")
-            actions = step.get("actions", [])
-            
-            # 字幕直接切换 (无特效)
-            new_sub = Text(voice_text, font_size=UGP_CONFIG["font_size_subtitle"], color=BLACK)
-            # 字幕自动换行处理 (简单版)
-            if len(voice_text) > 50:
-                 new_sub = Text("\n".join(textwrap.wrap(voice_text, 50)), font_size=UGP_CONFIG["font_size_subtitle"]*0.8, color=BLACK)
-            new_sub.move_to(self.zone_footer["center"])
-            
-            self.remove(self.subtitle_obj)
-            self.add(new_sub)
-            self.subtitle_obj = new_sub
-            
-            duration = self.play_voice(voice_text, i)
-            run_time = max(duration, 1.5)
-
-            anims = []
-            for action in actions:
-                anim = self.parse_action(action)
-                if anim: anims.append(anim)
-            
-            if anims:
-                self.play(AnimationGroup(*anims), run_time=run_time)
-            else:
-                self.wait(run_time)
-
-    def parse_action(self, action):
-        op = action["op"]
-        
-        if op == "WRITE_MATH":
-            content = action.get("content", "")
-            tex = MathTex(content, color=UGP_CONFIG["math_color"], font_size=UGP_CONFIG["font_size_math"])
-            if not self.math_lines: tex.move_to(self.zone_solution["cursor"], aligned_edge=UL)
-            else: tex.next_to(self.math_lines[-1], DOWN, buff=0.4).align_to(self.math_lines[-1], LEFT)
-            self.math_lines.append(tex)
-            return Write(tex)
-
-        elif op == "DRAW_AXES":
-            # 增强版：如果是 1D 数轴，画 NumberLine；如果是 2D，画 Axes
-            params = action.get("params", {})
-            # 简单判断：如果 y_range 很小，或者是 layout 中所有点 Y 坐标都差不多，可能是数轴
-            # 但这里最稳妥的是看 params
-            
-            # 默认画 1D 数轴 (因为很多几何题是数轴)
-            x_min, x_max = params.get("x_range", [-5, 5])[:2]
-            
-            number_line = NumberLine(
-                x_range=[x_min, x_max, 1],
-                length=self.zone_figure["width"] * 0.9,
-                color=GRAY,
-                include_numbers=True,
-                label_direction=DOWN
-            ).move_to(self.zone_figure["center"] + DOWN) # 下移一点，让图形在上面
-            return Create(number_line)
-
-        elif op == "DRAW_ARC":
-            if len(action.get("targets", [])) >= 3:
-                # ... (圆弧逻辑同上一个版本，保持不变) ...
-                c_id, s_id, e_id = action["targets"][:3]
-                p_c, p_s, p_m = self.get_coords(c_id), self.get_coords(s_id), self.get_coords(e_id)
-                radius = np.linalg.norm(p_s - p_c)
-                v_s, v_e = p_s - p_c, p_m - p_c
-                ang_s = np.arctan2(v_s[1], v_s[0])
-                ang_e = np.arctan2(v_e[1], v_e[0])
-                if ang_e < ang_s: ang_e += TAU
-                arc = Arc(radius=radius, start_angle=ang_s, angle=ang_e-ang_s, arc_center=p_c, color=UGP_CONFIG["drawing_color"])
-                return Create(arc)
-
-        # 自动画字母逻辑
-        elif op == "DRAW_SHAPE":
-            targets = action.get("targets", [])
-            pts = [self.get_coords(p) for p in targets]
-            color = action.get("color", UGP_CONFIG["drawing_color"])
-            g = VGroup()
-            
-            if action.get("type") == "point":
-                for i, p in enumerate(pts):
-                    d = Dot(p, color=color)
-                    l = Tex(targets[i], color=BLACK, font_size=30).next_to(d, UP*0.3)
-                    g.add(d, l)
-                    self.ugp_objects[targets[i]] = d
-            else:
-                poly = Polygon(*pts, color=color)
-                g.add(poly)
-                self.ugp_objects["".join(sorted(targets))] = poly
-                for i, p in enumerate(pts):
-                    # 智能方向：从中心向外
-                    center = poly.get_center()
-                    direction = normalize(p - center)
-                    if np.linalg.norm(direction) == 0: direction = UP
-                    l = Tex(targets[i], color=BLACK, font_size=30).next_to(p, direction * 0.3)
-                    g.add(l)
-            return Create(g)
-
-        elif op == "DRAW_LINE":
-            # ... (同前) ...
-            targets = action.get("targets", [])
-            p1, p2 = self.get_coords(targets[0]), self.get_coords(targets[1])
-            l = Line(p1, p2, color=UGP_CONFIG["drawing_color"])
-            if action.get("type") == "dashed": l = DashedLine(p1, p2, color=UGP_CONFIG["drawing_color"])
-            return Create(l)
-
-        elif op == "ADD_MARKER":
-             # ... (同前) ...
-             style = action.get("style")
-             if style == "tick" and len(action.get("targets", [])) >= 2:
-                 p1, p2 = self.get_coords(action["targets"][0]), self.get_coords(action["targets"][1])
-                 tick = Line(UP, DOWN, color=UGP_CONFIG["marker_color"]).scale(0.1).move_to(Line(p1,p2).get_center()).rotate(Line(p1,p2).get_angle()+PI/2)
-                 return Create(tick)
-             elif style == "right_angle":
-                 pA, pB, pC = [self.get_coords(p) for p in action["targets"]]
-                 return Create(RightAngle(Line(pB, pA), Line(pB, pC), length=0.3, color=UGP_CONFIG["marker_color"]))
-
-        elif op == "HIGHLIGHT":
-             # ... (同前) ...
-             anims = []
-             for tid in action.get("targets", []):
-                 keys = [tid, "".join(sorted(tid))]
-                 obj = None
-                 for k in keys: 
-                     if k in self.ugp_objects: obj = self.ugp_objects[k]
-                 if obj: anims.append(Indicate(obj, color=UGP_CONFIG["highlight_color"], scale_factor=1.5))
-             if anims: return AnimationGroup(*anims)
-             
-        elif op == "LABEL_COORD":
-            # ... (同前) ...
-            target = action["target"]
-            if target in self.ugp_objects:
-                dot = self.ugp_objects[target]
-                vect = {"UP": UP, "DOWN": DOWN}.get(action.get("direction", "DOWN"), DOWN)
-                return Write(MathTex(action["text"], color=BLACK, font_size=24).next_to(dot, vect))
-
-        return None
-
-    def play_voice(self, text, idx):
-        if not text: return 0.5
-        path = f"temp/voice_{idx}.mp3"
-        os.makedirs("temp", exist_ok=True)
-        try:
-            if not os.path.exists(path):
-                gTTS(text=text, lang='en').save(path)
-            self.add_sound(path)
-            return len(text) * 0.1 + 0.5
-        except: return 1.0
\ No newline at end of file
+from manim import *
+import json
+import os
+import uuid
+import numpy as np
+from PIL import Image
+from layout_config import UGP_CONFIG
+import tts_cache
+import tex_batch
+import narration
+from narration import frames_run_time, frozen_run_time
+import svg_cache
+from static_layer import StaticLayer
+from profiler import TRACER
+from video_tools import encode_still
+from text_layout import fitted_text
+from subtitle_bank import SubtitleBank
+from get_norm import FINAL_LAYOUT_NAME
+
+TASK_FILE = "../题目/1/output/render_task.json"
+
+class UGPScene(Scene):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 实际写进视频的帧数 (profile 用)：包住 renderer.add_frame 计数，跳过模式下 manim 不写帧，不计
+        self.frames_written = 0
+        add_frame = self.renderer.add_frame
+
+        def counted_add_frame(frame, num_frames=1):
+            if not self.renderer.skip_animations:
+                self.frames_written += num_frames
+            return add_frame(frame, num_frames)
+        self.renderer.add_frame = counted_add_frame
+
+    def setup(self):
+        # manim 在 construct() 之前调用：读任务，并把所有台词预先合成好
+        with TRACER.span("load_data"):
+            self.load_data()
+        # Tex/Text 的 svg 都走跨项目共享缓存
+        svg_cache.install()
+        # 字幕最先交给 worker 进程渲染，和下面的配音合成、公式编译同时进行
+        self.setup_layout_regions()
+        self.start_subtitle_bank()
+        # 预览模式只出关键帧，不需要配音和时间轴
+        if not self.preview_dir:
+            self.prefetch_voices()
+        # 所有 MathTex/Tex 一次性编译好，parse_action 里直接命中
+        tex_batch.precompile([self.task_data])
+
+    def construct(self):
+        self.camera.background_color = UGP_CONFIG["camera_bg_color"]
+
+        # 静态图层缓存：已定型的对象只光栅化一次 (只有 Cairo 渲染器支持)
+        self.static_layer = None
+        if UGP_CONFIG["static_layer"] and hasattr(self.renderer, "save_static_frame_data"):
+            self.static_layer = StaticLayer(self.renderer)
+        
+        # 1. 显示题目 (已修复溢出问题)；预览模式下所有动画都直接跳到终态
+        if self.preview_dir:
+            self.set_skipping(True)
+        with TRACER.span("show_problem_statement", "text"):
+            self.show_problem_statement()
+        if self.preview_dir and self.step_range[0] == 0:
+            self.save_keyframe("header")
+
+        # 2. 计算几何变换 (保留了抗扁平逻辑)
+        with TRACER.span("calculate_figure_transform"):
+            self.calculate_figure_transform()
+
+        # 3. 执行剧本
+        self.execute_timeline()
+
+    def play(self, *args, **kwargs):
+        # profile：每次 play / wait 的耗时和实际写出的帧数 (跳过的步骤帧数为 0)。wait 内部也走 play
+        name = "wait" if len(args) == 1 and isinstance(args[0], Wait) else "play"
+        with TRACER.span(name, "render") as span:
+            start_frames = self.frames_written
+            super().play(*args, **kwargs)
+            span["frames"] = self.frames_written - start_frames
+
+    # =======================================================
+    # 🏗️ 布局系统
+    # =======================================================
+    def setup_layout_regions(self):
+        h = config.frame_height
+        w = config.frame_width
+        
+        header_h = h * UGP_CONFIG["layout_header_h"]
+        footer_h = h * UGP_CONFIG["layout_footer_h"]
+        middle_h = h - header_h - footer_h
+        left_w = w * UGP_CONFIG["layout_split_ratio"]
+        right_w = w - left_w
+        
+        # Header
+        self.zone_header = {"center": UP * (h/2 - header_h/2), "width": w, "height": header_h}
+        # Footer
+        self.zone_footer = {"center": DOWN * (h/2 - footer_h/2), "width": w, "height": footer_h}
+        
+        center_y = (self.zone_header["center"][1] - header_h/2) - middle_h/2
+        
+        # Solution (Left)
+        self.zone_solution = {
+            "center": np.array([-w/2 + left_w/2, center_y, 0]),
+            "width": left_w, "height": middle_h,
+            "cursor": np.array([-w/2 + 0.5, center_y + middle_h/2 - 0.8, 0])
+        }
+        # Figure (Right)
+        self.zone_figure = {
+            "center": np.array([w/2 - right_w/2, center_y, 0]),
+            "width": right_w, "height": middle_h
+        }
+
+    # =======================================================
+    # 📝 核心修复：题目显示 (自动换行 + 自动缩放)
+    # =======================================================
+    def show_problem_statement(self):
+        raw_text = self.task_data["meta"].get("problem_text", "Geometry Problem")
+        
+        # 按字宽换行 + 选字号 (Header 区域留 10% 边距)，算好之后只建一个 Text
+        label = fitted_text(
+            raw_text,
+            self.zone_header["width"] * 0.9, self.zone_header["height"] * 0.9,
+            UGP_CONFIG["font_size_header"],
+            color=UGP_CONFIG["text_main_color"],
+            line_spacing=1.2,
+            weight=BOLD
+        )
+        label.move_to(self.zone_header["center"])
+        self.add(label)
+
+    # =======================================================
+    # 📐 抗扁平与自动构图
+    # =======================================================
+    def calculate_figure_transform(self):
+        layout = self.task_data["layout_info"]["relative_layout"]
+        # 点名 -> 坐标表中的行号
+        self.point_index = {pid: row for row, pid in enumerate(layout)}
+        if not layout: 
+            self.fig_scale = 1.0; self.fig_rel_center = np.array([0.5, 0.5, 0])
+            self.point_table = np.empty((0, 3)); return
+
+        # 获取真实长宽比
+        self.img_aspect = self.task_data["layout_info"].get("aspect_ratio", 1.77)
+
+        # 还原物理坐标以计算包围盒 (一次性向量化)
+        arr = np.asarray(list(layout.values()), dtype=float)[:, :2] * [self.img_aspect, 1.0]
+        min_x, min_y = np.min(arr, axis=0)
+        max_x, max_y = np.max(arr, axis=0)
+        
+        self.phys_center = np.array([(min_x + max_x)/2.0, (min_y + max_y)/2.0, 0])
+        
+        span_x = max(max_x - min_x, 0.2)
+        span_y = max(max_y - min_y, 0.2)
+        
+        # 缩放倍率计算
+        target_w = self.zone_figure["width"] * 0.75
+        target_h = self.zone_figure["height"] * 0.75
+        
+        # 基准单位 8.0
+        scale_x = target_w / (span_x * 8.0)
+        scale_y = target_h / (span_y * 8.0)
+        
+        self.fig_scale = min(scale_x, scale_y) * 8.0
+
+        # 所有点的场景坐标一次算好：缩放、翻转Y、平移
+        table = np.zeros((len(arr), 3))
+        table[:, :2] = (arr - self.phys_center[:2]) * [self.fig_scale, -self.fig_scale]
+        table += self.zone_figure["center"]
+        # 只读：get_coords 直接返回表中的行，防止调用方原地修改
+        table.setflags(write=False)
+        self.point_table = table
+
+    def get_coords(self, pid):
+        row = self.point_index.get(pid)
+        if row is None:
+            return self.zone_figure["center"]
+        return self.point_table[row]
+
+    def get_coords_batch(self, pids):
+        """批量查询：返回 (len(pids), 3) 的数组，不存在的点落在图形区中心。"""
+        rows = [self.point_index.get(pid, -1) for pid in pids]
+        coords = self.point_table[[max(r, 0) for r in rows]] if self.point_table.size else np.zeros((len(rows), 3))
+        missing = [i for i, r in enumerate(rows) if r < 0]
+        if missing:
+            coords[missing] = self.zone_figure["center"]
+        return coords
+
+    # =======================================================
+    # 🎬 执行与动作解析
+    # =======================================================
+    def load_data(self):
+        # 批量渲染时由 batch_render.py 通过环境变量 UGP_TASK_FILE 指定任务文件
+        task_file = os.environ.get("UGP_TASK_FILE", TASK_FILE)
+        if not os.path.exists(task_file): raise FileNotFoundError(f"Missing {task_file}")
+        self.task_data = load_task(task_file)
+        self.ugp_objects = {}; self.math_lines = [] 
+
+        # 分段渲染时由 UGP_STEP_RANGE="start:end" 指定只出哪几步的画面，之前的步骤只推进场景状态
+        n_steps = len(self.task_data["timeline"])
+        start, _, end = os.environ.get("UGP_STEP_RANGE", "").partition(":")
+        self.step_range = (int(start or 0), int(end or n_steps))
+        # 分镜预览：UGP_PREVIEW_DIR 指定时每一步只把终态存成一张 PNG (见 storyboard.py)
+        self.preview_dir = os.environ.get("UGP_PREVIEW_DIR") or None
+
+    def set_skipping(self, skip):
+        # manim 每次 play 开始时会把 skip_animations 重置为 _original_skipping_status，两个都要设
+        self.renderer._original_skipping_status = skip
+        self.renderer.skip_animations = skip
+
+    def execute_timeline(self):
+        self.subtitle_obj = Text("", font_size=UGP_CONFIG["font_size_subtitle"]).move_to(self.zone_footer["center"])
+        self.add(self.subtitle_obj)
+
+        start, end = self.step_range
+        for i, step in enumerate(self.task_data["timeline"][:end]):
+            voice_text = step.get("voice", "")
+            actions = step.get("actions", [])
+
+            # 范围之前的步骤：动画直接跳到终态，不写帧、不配音、不建字幕
+            if i < start:
+                self.set_skipping(True)
+                anims = self.build_step(actions)
+                if anims: self.play(AnimationGroup(*anims))
+                continue
+            self.set_skipping(bool(self.preview_dir))
+            with TRACER.span("step", "step", index=i):
+                self.run_step(i, voice_text, actions)
+
+    def run_step(self, i, voice_text, actions):
+        """渲染时间线上的第 i 步：换字幕、播放这一步的动画。"""
+        # 之前步骤画完的对象都已定型，进静态背景层 (字幕每步都换，不算)
+        if self.static_layer:
+            self.static_layer.settle(m for m in self.mobjects if m is not self.subtitle_obj)
+        
+        # 字幕直接切换 (无特效)
+        with TRACER.span("subtitle", "text"):
+            new_sub = self.subtitle_bank.get(voice_text)
+            new_sub.move_to(self.zone_footer["center"])
+        
+        self.remove(self.subtitle_obj)
+        self.add(new_sub)
+        self.subtitle_obj = new_sub
+        
+        anims = self.build_step(actions)
+
+        if self.preview_dir:
+            # 跳过模式下 play 直接把动画推到终态，不写帧
+            if anims: self.play(AnimationGroup(*anims))
+            self.save_keyframe(f"step_{i:03d}")
+            return
+
+        # 有配音时按音频真实时长取整到帧，画面与旁白一样长；没有配音的步骤保留最短停留时间
+        # 配音本身不在这里加：出片时按同一份时间轴整条 mux (见 narration.py)
+        # play 的 run_time 用 frames_run_time 换算，wait 走 wait_frames，manim 才会正好写出这么多帧
+        frames = self.step_plan[i]["frames"]
+        fps = config.frame_rate
+
+        if not UGP_CONFIG["static_hold"]:
+            if anims:
+                self.play(AnimationGroup(*anims), run_time=frames_run_time(frames, fps))
+            else:
+                self.wait_frames(frames)
+            return
+
+        # 动画按自然时长播放 (不超过旁白)，剩下的时间画面静止
+        if anims:
+            group = AnimationGroup(*anims)
+            anim_frames = min(frames, max(1, int(np.ceil(group.get_run_time() * fps - 1e-6))))
+            self.play(group, run_time=frames_run_time(anim_frames, fps))
+            frames -= anim_frames
+        self.hold(frames)
+
+    def save_keyframe(self, name):
+        """当前画面 (完整重画一次，不用静态背景缓存) 存成 preview_dir/<name>.png。"""
+        self.renderer.static_image = None
+        self.renderer.update_frame(self)
+        Image.fromarray(self.renderer.get_frame()).convert("RGB").save(os.path.join(self.preview_dir, name + ".png"))
+
+    def hold(self, frames):
+        """
+        画面静止 frames 帧：只光栅化一帧，直接编码成一段静止视频，接进 manim 的分段列表，
+        不再逐帧走渲染 / 编码管线。有 updater 要逐帧更新，或不是输出 mp4 时，退回普通的 wait。
+        本次渲染还没有 play 过时也走 wait：num_plays 为 0 时 manim 不会调用 file_writer.finish()，
+        只有纯配音步骤的分段 (incremental_render / hls_render) 就会没有成片。
+        """
+        if frames <= 0: return
+        writer = getattr(self.renderer, "file_writer", None)
+        if (self.renderer.skip_animations or writer is None or self.renderer.num_plays == 0
+                or self.needs_frame_updates()
+                or not config.write_to_movie or config.save_pngs or config.movie_file_extension != ".mp4"):
+            self.wait_frames(frames)
+            return
+
+        with TRACER.span("hold", "render") as span:
+            self.renderer.static_image = None
+            self.renderer.update_frame(self)
+            name = f"hold_{uuid.uuid4().hex[:12]}"
+            image_path = os.path.join(writer.partial_movie_directory, name + ".png")
+            movie_path = os.path.join(writer.partial_movie_directory, name + ".mp4")
+            Image.fromarray(self.renderer.get_frame()).convert("RGB").save(image_path)
+            try:
+                encode_still(image_path, frames, config.frame_rate, movie_path)
+            finally:
+                os.remove(image_path)
+            # combine_to_movie 按列表顺序拼接各段；时间轴照常推进
+            writer.sections[-1].partial_movie_files.append(movie_path)
+            self.renderer.time += frames / config.frame_rate
+            self.frames_written += frames
+            span["frames"] = frames
+
+    def wait_frames(self, frames):
+        """
+        用 manim 的 wait 停 frames 帧。静态 wait 和有 updater 的 wait 在 manim 里取帧方式不同
+        (前者向下取整、后者向上取整)，时长按实际走的路径换算，并显式指定 frozen_frame，两边都正好 frames 帧。
+        """
+        if self.needs_frame_updates():
+            self.wait(frames_run_time(frames, config.frame_rate), frozen_frame=False)
+        else:
+            self.wait(frozen_run_time(frames, config.frame_rate), frozen_frame=True)
+
+    def needs_frame_updates(self):
+        """
+        当前画面是否要逐帧更新 (有 scene / mobject 的 updater)。
+        不用 manim 的 should_update_mobjects：它读的是上一次 play 的 animations[0].is_static_wait，只有 Wait 有这个属性。
+        """
+        return bool(self.always_update_mobjects or self.updaters
+                    or any(m.has_time_based_updater() for m in self.get_mobject_family_members()))
+
+    def build_step(self, actions):
+        """一步里所有动作的动画。公式列的滚动按这一步新增的全部行一次算出，只产生一组平移 / 淡出。"""
+        anims = [a for a in map(self.parse_action, actions) if a]
+        scroll = self.scroll_solution_column()
+        return [scroll] + anims if scroll else anims
+
+    def parse_action(self, action):
+        with TRACER.span(f"parse_action:{action['op']}", "build"):
+            return self.build_action(action)
+
+    def build_action(self, action):
+        op = action["op"]
+        
+        if op == "WRITE_MATH":
+            content = action.get("content", "")
+            tex = MathTex(content, color=UGP_CONFIG["math_color"], font_size=UGP_CONFIG["font_size_math"])
+            if not self.math_lines: tex.move_to(self.zone_solution["cursor"], aligned_edge=UL)
+            else: tex.next_to(self.math_lines[-1], DOWN, buff=0.4).align_to(self.math_lines[-1], LEFT)
+            # 超出解题区时的整列滚动等整步的公式都建好后统一算 (见 build_step)
+            self.math_lines.append(tex)
+            return Write(tex)
+
+        elif op == "DRAW_AXES":
+            # 增强版：如果是 1D 数轴，画 NumberLine；如果是 2D，画 Axes
+            params = action.get("params", {})
+            # 简单判断：如果 y_range 很小，或者是 layout 中所有点 Y 坐标都差不多，可能是数轴
+            # 但这里最稳妥的是看 params
+            
+            # 默认画 1D 数轴 (因为很多几何题是数轴)
+            x_min, x_max = params.get("x_range", [-5, 5])[:2]
+            
+            number_line = NumberLine(
+                x_range=[x_min, x_max, 1],
+                length=self.zone_figure["width"] * 0.9,
+                color=GRAY,
+                include_numbers=True,
+                label_direction=DOWN
+            ).move_to(self.zone_figure["center"] + DOWN) # 下移一点，让图形在上面
+            return Create(number_line)
+
+        elif op == "DRAW_ARC":
+            if len(action.get("targets", [])) >= 3:
+                # ... (圆弧逻辑同上一个版本，保持不变) ...
+                c_id, s_id, e_id = action["targets"][:3]
+                p_c, p_s, p_m = self.get_coords(c_id), self.get_coords(s_id), self.get_coords(e_id)
+                radius = np.linalg.norm(p_s - p_c)
+                v_s, v_e = p_s - p_c, p_m - p_c
+                ang_s = np.arctan2(v_s[1], v_s[0])
+                ang_e = np.arctan2(v_e[1], v_e[0])
+                if ang_e < ang_s: ang_e += TAU
+                arc = Arc(radius=radius, start_angle=ang_s, angle=ang_e-ang_s, arc_center=p_c, color=UGP_CONFIG["drawing_color"])
+                return Create(arc)
+
+        # 自动画字母逻辑
+        elif op == "DRAW_SHAPE":
+            targets = action.get("targets", [])
+            pts = self.get_coords_batch(targets)
+            color = action.get("color", UGP_CONFIG["drawing_color"])
+            g = VGroup()
+            
+            if action.get("type") == "point":
+                for i, p in enumerate(pts):
+                    d = Dot(p, color=color)
+                    l = Tex(targets[i], color=BLACK, font_size=30).next_to(d, UP*0.3)
+                    g.add(d, l)
+                    self.ugp_objects[targets[i]] = d
+            else:
+                poly = Polygon(*pts, color=color)
+                g.add(poly)
+                self.ugp_objects["".join(sorted(targets))] = poly
+                for i, p in enumerate(pts):
+                    # 智能方向：从中心向外
+                    center = poly.get_center()
+                    direction = normalize(p - center)
+                    if np.linalg.norm(direction) == 0: direction = UP
+                    l = Tex(targets[i], color=BLACK, font_size=30).next_to(p, direction * 0.3)
+                    g.add(l)
+            return Create(g)
+
+        elif op == "DRAW_LINE":
+            # ... (同前) ...
+            targets = action.get("targets", [])
+            p1, p2 = self.get_coords(targets[0]), self.get_coords(targets[1])
+            l = Line(p1, p2, color=UGP_CONFIG["drawing_color"])
+            if action.get("type") == "dashed": l = DashedLine(p1, p2, color=UGP_CONFIG["drawing_color"])
+            return Create(l)
+
+        elif op == "ADD_MARKER":
+             # ... (同前) ...
+             style = action.get("style")
+             if style == "tick" and len(action.get("targets", [])) >= 2:
+                 p1, p2 = self.get_coords(action["targets"][0]), self.get_coords(action["targets"][1])
+                 tick = Line(UP, DOWN, color=UGP_CONFIG["marker_color"]).scale(0.1).move_to(Line(p1,p2).get_center()).rotate(Line(p1,p2).get_angle()+PI/2)
+                 return Create(tick)
+             elif style == "right_angle":
+                 pA, pB, pC = self.get_coords_batch(action["targets"])
+                 return Create(RightAngle(Line(pB, pA), Line(pB, pC), length=0.3, color=UGP_CONFIG["marker_color"]))
+
+        elif op == "HIGHLIGHT":
+             # ... (同前) ...
+             anims = []
+             for tid in action.get("targets", []):
+                 keys = [tid, "".join(sorted(tid))]
+                 obj = None
+                 for k in keys: 
+                     if k in self.ugp_objects: obj = self.ugp_objects[k]
+                 if obj: anims.append(Indicate(obj, color=UGP_CONFIG["highlight_color"], scale_factor=1.5))
+             if anims: return AnimationGroup(*anims)
+             
+        elif op == "LABEL_COORD":
+            # ... (同前) ...
+            target = action["target"]
+            if target in self.ugp_objects:
+                dot = self.ugp_objects[target]
+                vect = {"UP": UP, "DOWN": DOWN}.get(action.get("direction", "DOWN"), DOWN)
+                return Write(MathTex(action["text"], color=BLACK, font_size=24).next_to(dot, vect))
+
+        return None
+
+    def start_subtitle_bank(self):
+        # 只收集本次要出画面的步骤的字幕，换行和字号按 Footer 区域 (留边距) 算好
+        start, end = self.step_range
+        texts = [step.get("voice", "") for step in self.task_data["timeline"][start:end]]
+        with TRACER.span("subtitle_bank", "text"):
+            # 预览模式由 storyboard.py 在外层按步骤分组并行，这里不再起进程池
+            self.subtitle_bank = SubtitleBank(texts, self.zone_footer["width"] * 0.95, self.zone_footer["height"] * 0.9,
+                                              UGP_CONFIG["font_size_subtitle"], workers=0 if self.preview_dir else None,
+                                              color=BLACK)
+
+    def prefetch_voices(self):
+        # 并发合成全部台词 (结果进共享 TTS 缓存)，并按配音真实时长排好每一步的时间轴，
+        # 渲染循环里不再等待语音合成
+        self.step_plan = narration.step_plan(self.task_data, config.frame_rate)
+
+    def scroll_solution_column(self):
+        """
+        这一步新增的公式超出解题区底部时，整列按累计超出量上移一次；移出顶部的旧行淡出
+        (FadeOut 结束后会从场景中移除)，场景里同时存在的公式行数有上限，每帧开销不随步骤数增长。
+        每一步只调用一次：同一步里多行公式各自生成 .animate 平移会互相覆盖，只有最后一个生效。
+        """
+        if not self.math_lines: return None
+        zone = self.zone_solution
+        bottom = zone["center"][1] - zone["height"] / 2 + UGP_CONFIG["solution_bottom_margin"]
+        overflow = bottom - self.math_lines[-1].get_bottom()[1]
+        if overflow <= 0: return None
+
+        top = zone["cursor"][1]
+        anims, kept = [], []
+        for line in self.math_lines:
+            if line not in self.mobjects:
+                # 同一步里刚创建、还没上屏的行：直接平移，它自己的 Write 会从新位置开始
+                line.shift(UP * overflow); kept.append(line)
+            elif line.get_top()[1] + overflow > top:
+                anims.append(FadeOut(line, shift=UP * overflow))
+            else:
+                anims.append(line.animate.shift(UP * overflow)); kept.append(line)
+        self.math_lines = kept
+        return AnimationGroup(*anims) if anims else None
+
+def load_task(task_path):
+    """
+    读 render_task.json。同目录下有 get_norm 产出的 final_layout.json 时，用其中归一化、
+    截断过离群点的坐标替换任务里透传的 LLM 原始坐标。分段哈希也按这份数据算 (segments.step_hashes)。
+    """
+    with open(task_path, "r", encoding="utf-8") as f:
+        task_data = json.load(f)
+    layout_path = os.path.join(os.path.dirname(os.path.abspath(task_path)), FINAL_LAYOUT_NAME)
+    if os.path.exists(layout_path):
+        with open(layout_path, "r", encoding="utf-8") as f:
+            layout = json.load(f)["layout"]
+        task_data["layout_info"]["relative_layout"] = {name: p["norm"] for name, p in layout.items()}
+    return task_data
+
+
+def _cache_counts():
+    counts = {f"tts.{k}": getattr(tts_cache.get_cache(), k) for k in ("hits", "misses")}
+    for name, c in svg_cache.stats().items():
+        counts.update({f"svg.{name}.{k}": v for k, v in c.items()})
+    return counts
+
+
+def _set_task_env(task_path, step_range=None, preview_dir=None):
+    # 同一进程会连续渲染多个任务，每次都把三个变量全部重设
+    os.environ["UGP_TASK_FILE"] = os.path.abspath(task_path)
+    if step_range:
+        os.environ["UGP_STEP_RANGE"] = f"{step_range[0]}:{step_range[1]}"
+    else:
+        os.environ.pop("UGP_STEP_RANGE", None)
+    if preview_dir:
+        os.environ["UGP_PREVIEW_DIR"] = os.path.abspath(preview_dir)
+    else:
+        os.environ.pop("UGP_PREVIEW_DIR", None)
+
+
+def render_task_file(task_path, output_path, quality="low_quality", step_range=None, media_dir=None):
+    """
+    在当前进程里渲染一个 render_task.json (或其中 step_range=(start, end) 的几步)，
+    成片移动到 output_path。整段渲染时配上整条旁白；分段渲染输出无声视频。供 batch_render / 分段渲染等脚本调用。
+    """
+    _set_task_env(task_path, step_range)
+    media_dir = media_dir or os.path.join(os.path.dirname(os.path.abspath(task_path)), "media")
+    if step_range:
+        # 不同分段可能在多个进程里同时渲染，各用各的 media 目录，避免成片和 partial 文件互相覆盖
+        media_dir = os.path.join(media_dir, f"steps_{step_range[0]}_{step_range[1]}")
+
+    render_config = {
+        "quality": quality,
+        "media_dir": media_dir,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }
+    # 同一进程可能连续渲染多个任务 (daemon / 进程池)，profile 按任务分开
+    TRACER.reset()
+    before = _cache_counts()
+    with tempconfig(render_config):
+        scene = UGPScene()
+        with TRACER.span("scene.render", "render"):
+            scene.render()
+        movie_path = str(scene.renderer.file_writer.movie_file_path)
+        frame_rate = config.frame_rate
+    if step_range:
+        # 分段是无声的，拼接之后由调用方统一配上整条旁白
+        os.replace(movie_path, output_path)
+    else:
+        narration.add_narration(scene.step_plan, frame_rate, movie_path, output_path)
+        os.remove(movie_path)
+
+    if TRACER.enabled:
+        for name, value in _cache_counts().items():
+            TRACER.count(name, value - before[name])
+        if scene.static_layer:
+            TRACER.count("static_layer.hits", scene.static_layer.hits)
+            TRACER.count("static_layer.misses", scene.static_layer.misses)
+        problem = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(task_path))))
+        TRACER.write(problem if not step_range else f"{problem}.steps_{step_range[0]}_{step_range[1]}")
+    return output_path
+
+
+def render_keyframes(task_path, frames_dir, step_range=None, quality="low_quality"):
+    """
+    分镜预览：只把 header 和每一步的终态画面存成 PNG，不合成配音、不编码视频。
+    动画全部在跳过模式下直接推到终态。返回 frames_dir。
+    """
+    os.makedirs(frames_dir, exist_ok=True)
+    _set_task_env(task_path, step_range, frames_dir)
+    render_config = {
+        "quality": quality,
+        "media_dir": os.path.join(frames_dir, ".media"),
+        "write_to_movie": False,
+        "disable_caching": True,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }
+    try:
+        with tempconfig(render_config):
+            UGPScene().render()
+    finally:
+        os.environ.pop("UGP_PREVIEW_DIR", None)
+    return frames_dir
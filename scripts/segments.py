@@ -0,0 +1,85 @@
+# segments.py
+# 分步内容哈希 + 已编码分段缓存：只重渲染内容真正变化的步骤
+import ast
+import functools
+import hashlib
+import os
+from disk_cache import DiskCache, make_key
+from layout_config import UGP_CONFIG
+
+# ================= Configuration =================
+SEGMENT_CACHE_DIR = os.environ.get("UGP_SEGMENT_CACHE", os.path.expanduser("~/.cache/ugp/segments"))
+SEGMENT_CACHE_MAX_BYTES = int(os.environ.get("UGP_SEGMENT_CACHE_MAX_BYTES", 10 * 1024 ** 3))  # 默认 10GB
+
+# 从这个文件出发、它 (直接或间接) import 的本目录模块，源码变了所有分段都要作废
+_RENDER_ENTRY = "renderer.py"
+
+_cache = None
+
+
+def get_segment_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(SEGMENT_CACHE_DIR, SEGMENT_CACHE_MAX_BYTES)
+    return _cache
+
+
+@functools.lru_cache(maxsize=None)
+def render_sources(entry=_RENDER_ENTRY):
+    """
+    entry 及其 import 到的所有本目录模块 (包括函数体里的延迟 import)，按文件名排序。
+    手写清单容易漏：video_tools / static_layer / subtitle_bank / svg_cache 改了也会影响画面。
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    found, todo = set(), [entry]
+    while todo:
+        name = todo.pop()
+        if name in found:
+            continue
+        found.add(name)
+        with open(os.path.join(here, name), "rb") as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                path = module.split(".")[0] + ".py"
+                if os.path.exists(os.path.join(here, path)):
+                    todo.append(path)
+    return tuple(sorted(found))
+
+
+def source_digest():
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in render_sources():
+        digest.update(name.encode())
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def tts_settings():
+    engine = os.environ.get("UGP_TTS_ENGINE", UGP_CONFIG["tts_engine"])
+    return [engine, UGP_CONFIG["tts_lang"], UGP_CONFIG["tts_voice"]]
+
+
+def step_hashes(task_data, quality):
+    """
+    每一步一个哈希 = 起始场景状态 + 本步 actions + 台词 + 配音设置。
+
+    起始场景状态由渲染代码、题目/布局和之前各步的 actions 链式决定；字幕每步都会替换，
+    不算进状态。所以只改一句台词只会让这一步失效，改了动作则这一步及之后的步骤都失效。
+    """
+    state = make_key("scene", source_digest(), quality,
+                     task_data["meta"], task_data["layout_info"])
+    hashes = []
+    for step in task_data["timeline"]:
+        actions = step.get("actions", [])
+        hashes.append(make_key("step", state, actions, step.get("voice", ""), tts_settings()))
+        state = make_key("state", state, actions)
+    return hashes
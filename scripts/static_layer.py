@@ -0,0 +1,68 @@
+# static_layer.py
+# 静态图层缓存：已经画完、不再变化的对象 (题目、完成的图形、旧公式) 光栅化成一张背景图，
+# 之后每次 play 只在这张背景上叠加其余静态对象和正在动的对象；
+# 被 HIGHLIGHT / 变换碰到 (内容变了) 时指纹不同，自动重新光栅化。
+import hashlib
+import numpy as np
+
+
+def _fingerprint(mobjects):
+    """对象身份 + 几何 + 颜色的哈希。Indicate 这类 there-and-back 动画结束后指纹会恢复原值。"""
+    digest = hashlib.sha1()
+    for mob in mobjects:
+        for sub in mob.get_family():
+            digest.update(id(sub).to_bytes(8, "little"))
+            digest.update(np.ascontiguousarray(sub.points).tobytes())
+            for attr in ("fill_rgbas", "stroke_rgbas", "stroke_width", "pixel_array"):
+                value = getattr(sub, attr, None)
+                if value is not None:
+                    digest.update(np.ascontiguousarray(value).tobytes())
+    return digest.hexdigest()
+
+
+class StaticLayer:
+    """挂在 CairoRenderer 上，替换它的 save_static_frame_data。"""
+
+    max_layers = 4                  # 保留最近几张背景 (高亮前后会在两三张之间来回切换)
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.settled = []           # 登记为"已定型"的对象
+        self.layers = {}            # 指纹 -> 背景像素，按使用先后排序
+        self.hits = 0
+        self.misses = 0
+        self._original = renderer.save_static_frame_data
+        renderer.save_static_frame_data = self.save_static_frame_data
+
+    def settle(self, mobjects):
+        """登记当前已定型的对象 (整体替换，已经移出场景的对象随之释放)。"""
+        self.settled = list(mobjects)
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        renderer = self.renderer
+        # manim 传进来的是展开后的叶子对象；属于已定型对象家族、且本次没在动的叶子进背景层
+        settled_ids = {id(sub) for mob in self.settled for sub in mob.get_family()}
+        layer = [m for m in static_mobjects if id(m) in settled_ids]
+        if not layer:
+            return self._original(scene, static_mobjects)
+        rest = [m for m in static_mobjects if id(m) not in settled_ids]
+
+        key = _fingerprint(layer)
+        pixels = self.layers.pop(key, None)
+        if pixels is None:
+            renderer.static_image = None
+            renderer.update_frame(scene, mobjects=layer)
+            pixels = renderer.get_frame().copy()
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.layers[key] = pixels
+        while len(self.layers) > self.max_layers:
+            self.layers.pop(next(iter(self.layers)))
+
+        # 背景层 + 其余静态对象 (字幕等) = 本次 play 的静态帧
+        renderer.static_image = pixels
+        if rest:
+            renderer.update_frame(scene, mobjects=rest)
+            renderer.static_image = renderer.get_frame()
+        return renderer.static_image
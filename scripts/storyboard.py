@@ -0,0 +1,102 @@
+# storyboard.py
+# 分镜预览：不合成配音、不编码视频，只把题目页和每一步的终态画面存成低清 PNG，再拼成一张联系表。
+# 检查 LLM 生成的任务 (点位、连线、字幕换行) 时几秒钟就能看完整节课。
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw
+from parallel_render import plan_groups
+from renderer import TASK_FILE, render_keyframes
+from utils import grid_font
+
+STORYBOARD_DIR = "storyboard"
+SHEET_NAME = "storyboard.png"
+DEFAULT_QUALITY = "low_quality"
+THUMB_WIDTH = 480
+SHEET_COLUMNS = 4
+LABEL_HEIGHT = 28
+PADDING = 8
+
+
+def frame_names(n_steps, step_range=None):
+    """联系表里的画面顺序：header (只在从第 0 步开始时有) + 每一步。"""
+    start, end = step_range or (0, n_steps)
+    return (["header"] if start == 0 else []) + [f"step_{i:03d}" for i in range(start, end)]
+
+
+def render_storyboard(task_path, frames_dir, workers, quality=DEFAULT_QUALITY):
+    """各组连续步骤在独立进程里出关键帧 (每组开头的状态靠跳过之前的步骤得到)。返回画面名列表。"""
+    with open(task_path, "r", encoding="utf-8") as f:
+        task_data = json.load(f)
+    n_steps = len(task_data["timeline"])
+    if n_steps == 0:
+        render_keyframes(task_path, frames_dir, None, quality)
+        return frame_names(0)
+
+    # 没有配音时长可参考，按每步的动作数估算开销
+    costs = [1 + len(step.get("actions", [])) for step in task_data["timeline"]]
+    groups = plan_groups(costs, max(1, min(workers, n_steps)))
+    if len(groups) == 1:
+        render_keyframes(task_path, frames_dir, None, quality)
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(groups), mp_context=ctx) as pool:
+            futures = [pool.submit(render_keyframes, task_path, frames_dir, g, quality) for g in groups]
+            for future in futures:
+                future.result()
+    return frame_names(n_steps)
+
+
+def contact_sheet(frames_dir, names, output_path, columns=SHEET_COLUMNS, thumb_width=THUMB_WIDTH):
+    """把 frames_dir/<name>.png 按顺序缩略排成网格，每张下面标上名字。缺失的画面留空白格。"""
+    paths = [os.path.join(frames_dir, name + ".png") for name in names]
+    first = next((p for p in paths if os.path.exists(p)), None)
+    if first is None:
+        raise FileNotFoundError(f"{frames_dir} 下没有关键帧")
+    with Image.open(first) as img:
+        thumb_height = round(img.height * thumb_width / img.width)
+
+    columns = max(1, min(columns, len(paths)))
+    rows = math.ceil(len(paths) / columns)
+    cell_w, cell_h = thumb_width + PADDING, thumb_height + LABEL_HEIGHT + PADDING
+    sheet = Image.new("RGB", (columns * cell_w + PADDING, rows * cell_h + PADDING), "white")
+    draw = ImageDraw.Draw(sheet)
+    font = grid_font(LABEL_HEIGHT - 10)
+    for k, (name, path) in enumerate(zip(names, paths)):
+        x = PADDING + (k % columns) * cell_w
+        y = PADDING + (k // columns) * cell_h
+        if os.path.exists(path):
+            with Image.open(path) as img:
+                img.draft("RGB", (thumb_width, thumb_height))
+                sheet.paste(img.convert("RGB").resize((thumb_width, thumb_height), Image.LANCZOS), (x, y))
+        else:
+            draw.rectangle([x, y, x + thumb_width - 1, y + thumb_height - 1], outline="red", width=2)
+        draw.rectangle([x, y, x + thumb_width - 1, y + thumb_height - 1], outline=(180, 180, 180))
+        draw.text((x + 4, y + thumb_height + 4), name, fill="black", font=font)
+    sheet.save(output_path, optimize=True)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分镜预览：每一步一张关键帧 + 联系表，不合成配音不编码视频")
+    parser.add_argument("task", nargs="?", default=TASK_FILE, help="render_task.json 路径")
+    parser.add_argument("--output-dir", help=f"关键帧目录 (默认 与任务同目录的 {STORYBOARD_DIR}/)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--quality", default=DEFAULT_QUALITY)
+    parser.add_argument("--columns", type=int, default=SHEET_COLUMNS)
+    args = parser.parse_args()
+
+    frames_dir = args.output_dir or os.path.join(os.path.dirname(os.path.abspath(args.task)), STORYBOARD_DIR)
+    start = time.perf_counter()
+    names = render_storyboard(args.task, frames_dir, args.workers, args.quality)
+    sheet = contact_sheet(frames_dir, names, os.path.join(frames_dir, SHEET_NAME), args.columns)
+    print(f"✅ {len(names)} 张关键帧 -> {frames_dir}")
+    print(f"🖼️ 联系表: {sheet}  (耗时 {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# subtitle_bank.py
+# 字幕预渲染：时间轴开始前收集任务里所有字幕，先算好换行和字号，再在 worker 进程里并行跑 Pango 出 svg
+# (进共享 svg 缓存)。主循环里取字幕时只剩读缓存建对象，字幕渲染不再卡在关键路径上。
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from layout_config import UGP_CONFIG
+from text_layout import build_text, text_spec
+
+MIN_PARALLEL = 8    # 字幕太少时起进程池 (每个 worker 都要导入 manim) 不划算，直接在主进程里建
+
+_pool = None        # 每个进程一个，多个场景 (render_daemon 连续处理的任务) 共用，worker 只导入一次 manim
+_pool_workers = 0
+
+
+def _render_chunk(specs):
+    """worker：把一组字幕渲染成 svg。只需要副作用 (svg 落进共享缓存)。"""
+    import svg_cache
+    from manim import Text
+    svg_cache.install()
+    for spec in specs:
+        Text(**spec)
+    return len(specs)
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers < workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_workers = workers
+    return _pool
+
+
+def _discard_pool():
+    global _pool
+    _pool = None
+
+
+class SubtitleBank:
+    """
+    bank = SubtitleBank(texts, max_width, max_height, font_size, color=BLACK)
+    bank.get(text) -> 排好版的 Text (同一句字幕只建一次)
+    """
+
+    def __init__(self, texts, max_width, max_height, font_size, workers=None, **text_kwargs):
+        self.layout = (max_width, max_height, font_size)
+        self.text_kwargs = text_kwargs
+        self.specs = {t: text_spec(t, *self.layout, **text_kwargs) for t in dict.fromkeys(texts)}
+        self.built = {}
+        self.pending = {}   # text -> 负责渲染它的 future
+
+        workers = UGP_CONFIG["subtitle_workers"] if workers is None else workers
+        todo = [t for t in self.specs if t]
+        workers = min(workers, os.cpu_count() or 1, len(todo))
+        # 本身已经是进程池里的 worker (batch_render / parallel_render / job_queue 等) 时不再起池：
+        # 外层已经占满了 CPU，每个 worker 再各起一组要导入 manim 的进程只会多付启动成本
+        if workers <= 1 or len(todo) < MIN_PARALLEL or multiprocessing.parent_process() is not None:
+            return
+        # 交错分块：靠前的字幕散在各个 worker 的前面，时间轴开头的几步最先就绪
+        pool = _get_pool(workers)
+        try:
+            for k in range(workers):
+                chunk = todo[k::workers]
+                future = pool.submit(_render_chunk, [self.specs[t] for t in chunk])
+                for t in chunk:
+                    self.pending[t] = future
+        except BrokenProcessPool:
+            # 之前的任务弄坏了常驻池 (worker 崩溃)：丢掉它，这次全部在主进程里建，下个场景重新起池
+            _discard_pool()
+            self.pending = {}
+
+    def get(self, text):
+        label = self.built.get(text)
+        if label is None:
+            future = self.pending.pop(text, None)
+            if future is not None:
+                try:
+                    future.result()
+                except Exception as e:
+                    # worker 失败不影响出片：这一组字幕改在主进程里建
+                    print(f"⚠️ 字幕预渲染失败，改为现场渲染: {e}")
+                    self.pending = {t: f for t, f in self.pending.items() if f is not future}
+            if text not in self.specs:
+                self.specs[text] = text_spec(text, *self.layout, **self.text_kwargs)
+            label = self.built[text] = build_text(self.specs[text], *self.layout[:2])
+        return label
@@ -0,0 +1,84 @@
+# svg_cache.py
+# 跨项目共享的 Tex / Text SVG 缓存：所有渲染进程共用一个目录，加文件锁、统计命中率、按大小做 LRU 淘汰
+import os
+import time
+from manim import config
+import manim.mobject.text.tex_mobject as tex_mobject
+from manim.mobject.text.text_mobject import MarkupText, Text
+from disk_cache import DiskCache, make_key
+
+# ================= Configuration =================
+SVG_CACHE_DIR = os.environ.get("UGP_SVG_CACHE", os.path.expanduser("~/.cache/ugp/svg"))
+SVG_CACHE_MAX_BYTES = int(os.environ.get("UGP_SVG_CACHE_MAX_BYTES", 1024 ** 3))  # Tex 和 texts 各 1GB
+
+_caches = {}
+_installed = False
+
+
+def get_caches():
+    if not _caches:
+        _caches["tex"] = DiskCache(os.path.join(SVG_CACHE_DIR, "Tex"), SVG_CACHE_MAX_BYTES)
+        _caches["text"] = DiskCache(os.path.join(SVG_CACHE_DIR, "texts"), SVG_CACHE_MAX_BYTES)
+    return _caches
+
+
+def _track(cache, key, produce):
+    """
+    持锁生成，按文件是否早于本次调用判断命中，并刷新访问时间供 LRU 使用。
+    锁按内容 key 加，和 manim 给 svg 起的文件名对不上；锁文件靠最近使用时间躲过孤儿锁清理。
+    """
+    start = time.time()
+    with cache.lock(key):
+        svg_path = str(produce())
+    if os.stat(svg_path).st_mtime < start:
+        cache.hits += 1
+    else:
+        cache.misses += 1
+    os.utime(svg_path)
+    return svg_path
+
+
+def install():
+    """
+    把 manim 的 tex_dir / text_dir 指向共享缓存，并给 TeX 编译和 Pango 文字渲染加上跨进程锁。
+    每个渲染进程在 setup 时调用一次 (tempconfig 退出后 config 会被还原，所以目录每次都要重新设置)。
+    """
+    global _installed
+    caches = get_caches()
+    config.tex_dir = caches["tex"].root
+    config.text_dir = caches["text"].root
+    if _installed:
+        return
+    _installed = True
+
+    original_tex_to_svg = tex_mobject.tex_to_svg_file
+
+    def locked_tex_to_svg_file(expression, environment=None, tex_template=None):
+        template = tex_template or config.tex_template
+        key = make_key("tex", expression, environment, template.body)
+        return _track(caches["tex"], key,
+                      lambda: original_tex_to_svg(expression, environment, tex_template))
+
+    tex_mobject.tex_to_svg_file = locked_tex_to_svg_file
+
+    for cls in (Text, MarkupText):
+        original_text2svg = cls._text2svg
+
+        def locked_text2svg(self, *args, _original=original_text2svg, **kwargs):
+            key = make_key("text", getattr(self, "text", ""))
+            return _track(caches["text"], key, lambda: _original(self, *args, **kwargs))
+
+        cls._text2svg = locked_text2svg
+
+
+def evict():
+    """
+    两个缓存各淘汰一次。要遍历整个缓存目录，不放在 install() 里 (每个渲染 / 字幕 worker 进程都会调用)，
+    由批量渲染、daemon、build 等入口进程在开始时调用一次。
+    """
+    return sum(cache.evict() for cache in get_caches().values())
+
+
+def stats():
+    """{"tex": {"hits": .., "misses": ..}, "text": {...}} (本进程内累计)"""
+    return {name: {"hits": c.hits, "misses": c.misses} for name, c in get_caches().items()}
@@ -0,0 +1,121 @@
+# synth_task.py
+# 生成合成的 render_task.json，规模可控 (点数 / 步数 / 动作比例 / 台词长度)，用于性能测试
+#
+#   python synth_task.py -o ../bench/big/output/render_task.json --points 40 --steps 200 \
+#       --mix WRITE_MATH=3,DRAW_SHAPE=1,DRAW_ARC=1,HIGHLIGHT=1 --voice-chars 60
+import argparse
+import json
+import os
+import random
+import string
+
+DEFAULT_MIX = {"WRITE_MATH": 3, "DRAW_SHAPE": 2, "DRAW_ARC": 1, "HIGHLIGHT": 1}
+
+# 台词素材：中英混排，和真实题目的字幕排版负载接近
+_VOICE_WORDS = ["同学们", "我们", "连接", "根据勾股定理", "可以得到", "线段", "的长度", "所以",
+                "三角形", "全等", "AB", "AC", "= 3", "对角线", "圆心", "半径", "数轴上", "点 M"]
+_MATH = [r"AB = {a}", r"AC^2 = AB^2 + BC^2", r"AC = \sqrt{{{a}}}", r"\angle A{p} = {a}^\circ",
+         r"\frac{{{a}}}{{{b}}} + \frac{{{b}}}{{{a}}} = {c}", r"x_{{{a}}} = -1 + \sqrt{{{b}}}"]
+
+
+def point_names(n):
+    """A, B, ..., Z, A1, B1, ... (和真实题目一样用大写字母命名)"""
+    letters = string.ascii_uppercase
+    return [letters[i % 26] + (str(i // 26) if i >= 26 else "") for i in range(n)]
+
+
+def _voice(rng, n_chars):
+    text = ""
+    while len(text) < n_chars:
+        text += rng.choice(_VOICE_WORDS)
+    return text[:n_chars] + "。" if n_chars else ""
+
+
+def _action(rng, op, names, drawn):
+    if op == "WRITE_MATH":
+        template = rng.choice(_MATH)
+        return {"op": op, "content": template.format(a=rng.randint(1, 20), b=rng.randint(1, 20),
+                                                      c=rng.randint(1, 40), p=rng.choice(names))}
+    if op == "DRAW_SHAPE":
+        if rng.random() < 0.3:
+            targets = rng.sample(names, min(len(names), rng.randint(1, 3)))
+            drawn.update(targets)
+            return {"op": op, "type": "point", "targets": targets}
+        targets = rng.sample(names, min(len(names), rng.randint(3, 5)))
+        drawn.add("".join(sorted(targets)))
+        return {"op": op, "type": "polygon", "targets": targets}
+    if op == "DRAW_ARC":
+        return {"op": op, "targets": rng.sample(names, min(len(names), 3))}
+    if op == "HIGHLIGHT":
+        # 高亮已经画过的对象，否则 renderer 里是空操作
+        pool = sorted(drawn) or names
+        return {"op": op, "targets": rng.sample(pool, min(len(pool), 2))}
+    raise ValueError(f"不支持的动作: {op}")
+
+
+def generate_task(n_points=8, n_steps=20, mix=None, voice_chars=40, actions_per_step=1, voice_only_every=0, seed=0):
+    """
+    按给定规模生成一个任务 (dict)。同样的参数 + seed 生成的任务完全相同。
+    voice_only_every=k 时第 0、k、2k ... 步只有台词没有动作 (其余步骤和不设时一样)。
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    names = point_names(max(n_points, 3))
+    ops, weights = zip(*mix.items())
+
+    drawn = set()
+    timeline = []
+    for _ in range(n_steps):
+        actions = [_action(rng, op, names, drawn) for op in rng.choices(ops, weights, k=actions_per_step)]
+        timeline.append({"voice": _voice(rng, voice_chars), "actions": actions})
+    if voice_only_every:
+        for step in timeline[::voice_only_every]:
+            step["actions"] = []
+
+    return {
+        "meta": {"problem_text": "合成测试题：" + _voice(rng, 60)},
+        "layout_info": {
+            "aspect_ratio": 1.5,
+            "relative_layout": {name: [round(rng.uniform(0.05, 0.95), 3), round(rng.uniform(0.05, 0.95), 3)]
+                                for name in names},
+        },
+        "timeline": timeline,
+    }
+
+
+def write_task(path, **params):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_task(**params), f, indent=2, ensure_ascii=False)
+    return path
+
+
+def parse_mix(text):
+    """"WRITE_MATH=3,DRAW_SHAPE=1" -> {"WRITE_MATH": 3, "DRAW_SHAPE": 1}"""
+    mix = {}
+    for item in text.split(","):
+        op, _, weight = item.partition("=")
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成的 render_task.json")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--points", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--mix", type=parse_mix, default=None, help="动作比例，如 WRITE_MATH=3,DRAW_SHAPE=1")
+    parser.add_argument("--voice-chars", type=int, default=40, help="每步台词字数 (0 = 无配音)")
+    parser.add_argument("--actions-per-step", type=int, default=1)
+    parser.add_argument("--voice-only-every", type=int, default=0, help="每隔几步放一个只有台词的步骤 (0 = 不放)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_task(args.output, n_points=args.points, n_steps=args.steps, mix=args.mix,
+               voice_chars=args.voice_chars, actions_per_step=args.actions_per_step,
+               voice_only_every=args.voice_only_every, seed=args.seed)
+    print(f"✅ 已生成: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# 脚本之间都是按文件名直接 import 的 (在 scripts/ 下运行)，测试时同样把 scripts/ 放进 sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
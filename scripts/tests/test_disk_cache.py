@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+from disk_cache import EVICT_GRACE_SECONDS, DiskCache
+
+
+def test_lock_survives_lock_file_removal(tmp_path):
+    """等锁期间锁文件被清理掉：等到锁的进程要锁到新文件上，和之后来的进程仍然互斥。"""
+    cache = DiskCache(str(tmp_path / "cache"), 1 << 20)
+    path = os.path.join(cache.lock_dir, "k.lock")
+    acquired, release = threading.Event(), threading.Event()
+
+    def waiter():
+        with cache.lock("k") as ok:
+            assert ok
+            acquired.set()
+            release.wait(5)
+
+    with cache.lock("k"):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.2)    # waiter 在旧文件上等锁
+        os.remove(path)
+    assert acquired.wait(5)
+    try:
+        with cache.lock("k", blocking=False) as ok:
+            assert not ok
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_orphan_sweep_keeps_recently_used_locks(tmp_path):
+    """锁的 key 和条目名对不上 (svg 缓存) 时，最近拿过的锁不被当成孤儿删掉，久没人用的才删。"""
+    cache = DiskCache(str(tmp_path / "cache"), 1 << 20)
+    old = time.time() - 2 * EVICT_GRACE_SECONDS
+    for key in ("used", "idle"):
+        with cache.lock(key):
+            pass
+        os.utime(os.path.join(cache.lock_dir, key + ".lock"), (old, old))
+    with cache.lock("used"):
+        pass
+    cache.evict()
+    assert os.path.exists(os.path.join(cache.lock_dir, "used.lock"))
+    assert not os.path.exists(os.path.join(cache.lock_dir, "idle.lock"))
@@ -0,0 +1,67 @@
+import json
+import math
+import shutil
+import pytest
+from narration import frames_run_time, frozen_run_time, step_frames
+
+
+def _manim_frame_count(run_time, frame_rate):
+    # manim 的帧时刻是 np.arange(0, run_time, 1 / fps)，长度 = ceil(run_time / step)
+    return math.ceil(run_time / (1 / frame_rate))
+
+
+@pytest.mark.parametrize("frame_rate", [15, 30, 60])
+def test_frames_run_time_yields_exact_frames(frame_rate):
+    for frames in range(1, 2000):
+        assert _manim_frame_count(frames_run_time(frames, frame_rate), frame_rate) == frames
+
+
+def test_exact_run_time_would_add_frames():
+    # frames / fps 本身会多出帧 (这正是要避开的情况)
+    assert any(_manim_frame_count(n / 15, 15) == n + 1 for n in range(1, 100))
+
+
+def test_frames_run_time_matches_numpy():
+    np = pytest.importorskip("numpy")
+    for frame_rate in (15, 30, 60):
+        for frames in range(1, 500):
+            assert len(np.arange(0, frames_run_time(frames, frame_rate), 1 / frame_rate)) == frames
+
+
+@pytest.mark.parametrize("frame_rate", [15, 24, 30, 60])
+def test_frozen_run_time_yields_exact_frames(frame_rate):
+    # 静态 wait 写 int(duration / dt) 帧，向下取整
+    dt = 1 / frame_rate
+    for frames in range(1, 5000):
+        assert int(frozen_run_time(frames, frame_rate) / dt) == frames
+
+
+def test_step_frames_rounds_up():
+    assert step_frames(1.0, 15) == 15
+    assert step_frames(1.01, 15) == 16
+    assert step_frames(0.0, 15) == 1
+
+
+@pytest.mark.parametrize("static_hold", [True, False])
+def test_planned_frames_match_rendered_video(tmp_path, monkeypatch, static_hold):
+    """整段渲染出来的帧数和 step_plan 规划的总帧数完全一致 (画面和旁白不漂移)，包括只有台词的步骤。"""
+    pytest.importorskip("manim")
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        pytest.skip("需要 ffmpeg / ffprobe")
+    from manim.constants import QUALITIES
+    from narration import step_plan
+    from renderer import render_task_file
+    from synth_task import write_task
+    from layout_config import UGP_CONFIG
+    from video_tools import count_frames
+
+    monkeypatch.setenv("UGP_TTS_ENGINE", "stub")
+    monkeypatch.setitem(UGP_CONFIG, "static_hold", static_hold)
+    task_path = write_task(str(tmp_path / "1" / "output" / "render_task.json"), n_steps=12, voice_only_every=3, seed=3)
+    output_path = str(tmp_path / "lesson.mp4")
+    render_task_file(task_path, output_path, "low_quality")
+
+    with open(task_path, "r", encoding="utf-8") as f:
+        task_data = json.load(f)
+    plan = step_plan(task_data, QUALITIES["low_quality"]["frame_rate"])
+    assert count_frames(output_path) == sum(step["frames"] for step in plan)
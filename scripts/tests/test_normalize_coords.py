@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+from utils import normalize_coords
+
+
+def test_relative_coordinates():
+    layout, canvas = normalize_coords({"A": [0.0, 0.0], "B": [1.0, 0.5]}, 2000, 1000)
+    assert canvas == [1000, 500]
+    assert layout["B"]["norm"] == [1.0, 0.5]
+    assert layout["B"]["canvas"] == [1000.0, 250.0]
+    assert not any(p["outlier"] for p in layout.values())
+
+
+def test_pixel_coordinates():
+    layout, _ = normalize_coords({"A": [200, 100], "B": [1000, 800], "C": [1600, 900]}, 2000, 1000)
+    assert layout["A"]["norm"] == [0.1, 0.1]
+    assert layout["C"]["norm"] == [0.8, 0.9]
+
+
+def test_one_bad_relative_point_does_not_rescale_the_rest():
+    raw = {"A": [0.1, 0.2], "B": [0.8, 0.2], "C": [0.5, 0.9], "D": [2.0, 0.5], "E": [0.4, 0.4]}
+    layout, _ = normalize_coords(raw, 1200, 800)
+    assert layout["A"]["norm"] == [0.1, 0.2]
+    assert layout["C"]["norm"] == [0.5, 0.9]
+    assert layout["D"]["outlier"]
+    assert layout["D"]["norm"] == [1.0, 0.5]
+    assert [n for n, p in layout.items() if p["outlier"]] == ["D"]
+
+
+def test_explicit_units():
+    layout, _ = normalize_coords({"A": [1, 1]}, 100, 100, units="pixel")
+    assert layout["A"]["norm"] == [0.01, 0.01]
+    with pytest.raises(ValueError):
+        normalize_coords({"A": [1, 1]}, 100, 100, units="cm")
+
+
+def test_invalid_point_is_outlier():
+    layout, _ = normalize_coords({"A": [0.5, 0.5], "B": "oops"}, 100, 100)
+    assert layout["B"]["outlier"] and layout["B"]["norm"] == [0.5, 0.5]
@@ -0,0 +1,14 @@
+import pytest
+
+parallel_render = pytest.importorskip("parallel_render", exc_type=ImportError)
+
+
+def test_plan_groups_covers_all_steps():
+    groups = parallel_render.plan_groups([3, 1, 1, 1, 2, 2], 3)
+    assert groups[0][0] == 0 and groups[-1][1] == 6
+    assert all(a[1] == b[0] for a, b in zip(groups, groups[1:]))
+    assert len(groups) <= 3
+
+
+def test_plan_groups_empty_timeline():
+    assert parallel_render.plan_groups([], 4) == [(0, 0)]
@@ -0,0 +1,60 @@
+import shutil
+import pytest
+
+
+def _render_scene(scene_cls, tmp_path):
+    from manim import tempconfig
+    with tempconfig({"quality": "low_quality", "media_dir": str(tmp_path / "media"),
+                     "progress_bar": "none", "verbosity": "WARNING"}):
+        scene = scene_cls()
+        scene.render()
+        return str(scene.renderer.file_writer.movie_file_path)
+
+
+def test_hold_after_play(tmp_path):
+    """play 之后直接 hold：不依赖上一次 play 是不是 Wait，帧数 = 动画帧 + 静止帧。"""
+    pytest.importorskip("manim")
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        pytest.skip("需要 ffmpeg / ffprobe")
+    from manim import FadeIn, Square, config
+    from narration import frames_run_time
+    from renderer import UGPScene
+    from video_tools import count_frames
+
+    class HoldScene(UGPScene):
+        def setup(self):
+            pass
+
+        def construct(self):
+            self.play(FadeIn(Square()), run_time=frames_run_time(7, config.frame_rate))
+            assert not self.needs_frame_updates()
+            self.hold(20)
+            assert self.frames_written == 27
+
+    assert count_frames(_render_scene(HoldScene, tmp_path)) == 27
+
+
+def test_hold_with_updater_falls_back_to_exact_wait(tmp_path):
+    """有 updater 时 hold 退回 wait，写出的帧数仍然正好是 frames。"""
+    pytest.importorskip("manim")
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        pytest.skip("需要 ffmpeg / ffprobe")
+    from manim import FadeIn, Square, config
+    from narration import frames_run_time
+    from renderer import UGPScene
+    from video_tools import count_frames
+
+    class UpdaterScene(UGPScene):
+        def setup(self):
+            pass
+
+        def construct(self):
+            square = Square()
+            self.play(FadeIn(square), run_time=frames_run_time(7, config.frame_rate))
+            square.add_updater(lambda m, dt: m.rotate(dt))
+            assert self.needs_frame_updates()
+            self.hold(23)
+            square.clear_updaters()
+            self.hold(31)
+
+    assert count_frames(_render_scene(UpdaterScene, tmp_path)) == 7 + 23 + 31
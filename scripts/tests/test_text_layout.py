@@ -0,0 +1,26 @@
+from text_layout import _tokens, wrap
+
+
+def test_decimal_number_is_not_split():
+    lines = wrap("所以线段AC的长度等于3.14159265", 15.2)
+    assert "".join(lines) == "所以线段AC的长度等于3.14159265"
+    assert any("3.14159265" in line for line in lines)
+
+
+def test_latin_runs_keep_inner_punctuation():
+    assert "e.g." in _tokens("e.g. 设 x=1")
+    assert "12:30" in _tokens("时间12:30开始")
+    assert "3.5," in _tokens("长度为3.5,宽为2")
+
+
+def test_no_line_start_punctuation_joins_previous_token():
+    assert _tokens("等于三。所以") == ["等", "于", "三。", "所", "以"]
+    assert _tokens("（见图）") == ["（见", "图）"]
+
+
+def test_wrap_never_starts_line_with_forbidden_punctuation():
+    text = "因为AB=AC，所以△ABC是等腰三角形。又因为∠A=60°，所以△ABC是等边三角形！"
+    for max_em in (4, 5, 6, 7.5, 9, 12):
+        lines = wrap(text, max_em)
+        assert "".join(lines) == text
+        assert all(line[0] not in "，。！" for line in lines if line)
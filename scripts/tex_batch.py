@@ -0,0 +1,168 @@
+# tex_batch.py
+# LaTeX 批量预编译：把一个(或一批)任务里所有 MathTex/Tex 放进一个多页文档，只跑一次 latex + dvisvgm，
+# 再把每一页拆成 manim 自己会去查的 media/Tex/<hash>.svg
+import argparse
+import json
+import os
+import re
+import subprocess
+import tempfile
+from manim import MathTex, Tex, config
+import manim.mobject.text.tex_mobject as tex_mobject
+from manim.utils.tex_file_writing import generate_tex_file
+from profiler import TRACER
+
+_PAGE_ENV = "ugppage"
+
+
+class _Captured(Exception):
+    pass
+
+
+def collect_tex(task_data):
+    """扫描时间轴，返回 renderer 会创建的全部 (类, TeX 字符串)，去重、保持顺序。"""
+    items = []
+    for step in task_data["timeline"]:
+        for action in step.get("actions", []):
+            op = action["op"]
+            if op == "WRITE_MATH":
+                items.append((MathTex, action.get("content", "")))
+            elif op == "LABEL_COORD" and "text" in action:
+                items.append((MathTex, action["text"]))
+            elif op == "DRAW_SHAPE":
+                items.extend((Tex, target) for target in action.get("targets", []))
+    return list(dict.fromkeys(items))
+
+
+def _tex_file_for(mob_cls, string):
+    """
+    让 manim 自己生成 .tex 文件 (文件名就是它的缓存哈希，和正式渲染时完全一致)，
+    在进入 latex 编译之前截住。返回 .tex 路径。
+    """
+    captured = {}
+
+    def capture(expression, environment=None, tex_template=None):
+        captured["path"] = str(generate_tex_file(expression, environment, tex_template))
+        captured["template"] = tex_template or config.tex_template
+        raise _Captured
+
+    original = tex_mobject.tex_to_svg_file
+    tex_mobject.tex_to_svg_file = capture
+    try:
+        mob_cls(string)
+    except _Captured:
+        pass
+    except Exception:
+        # 表达式本身有问题，留给正式渲染时由 manim 报错
+        return None, None
+    finally:
+        tex_mobject.tex_to_svg_file = original
+    return captured.get("path"), captured.get("template")
+
+
+def _split_document(tex_source):
+    head, _, rest = tex_source.partition("\\begin{document}")
+    body, _, _ = rest.partition("\\end{document}")
+    return head, body
+
+
+def _compile_batch(tex_paths, template, work_dir):
+    """把多个 .tex 合并成一个多页文档编译。成功返回按顺序的每页 svg 路径，失败返回 None。"""
+    preamble = None
+    bodies = []
+    for path in tex_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            head, body = _split_document(f.read())
+        preamble = preamble or head
+        bodies.append(body)
+
+    # standalone 的 multi 模式：每个 ugppage 环境单独成页，并像单个文档一样裁剪
+    if "{standalone}" not in preamble:
+        return None
+    preamble = re.sub(r"\\documentclass(\[([^\]]*)\])?\{standalone\}",
+                      lambda m: f"\\documentclass[{m.group(2) + ',' if m.group(2) else ''}multi={_PAGE_ENV}]{{standalone}}",
+                      preamble, count=1)
+    preamble += f"\\newenvironment{{{_PAGE_ENV}}}{{}}{{}}\n"
+    document = preamble + "\\begin{document}\n"
+    document += "".join(f"\\begin{{{_PAGE_ENV}}}{body}\\end{{{_PAGE_ENV}}}\n" for body in bodies)
+    document += "\\end{document}\n"
+
+    batch_tex = os.path.join(work_dir, "batch.tex")
+    with open(batch_tex, "w", encoding="utf-8") as f:
+        f.write(document)
+
+    compiler = template.tex_compiler
+    output_format = template.output_format  # ".dvi" / ".xdv" / ".pdf"
+    if compiler in ("xelatex",):
+        cmd = [compiler, "-no-pdf", "-interaction=batchmode", "-halt-on-error",
+               f"-output-directory={work_dir}", batch_tex]
+    else:
+        cmd = [compiler, "-interaction=batchmode", f"-output-format={output_format[1:]}", "-halt-on-error",
+               f"-output-directory={work_dir}", batch_tex]
+    if subprocess.run(cmd, capture_output=True).returncode != 0:
+        return None
+
+    compiled = os.path.join(work_dir, "batch" + output_format)
+    svg_pattern = os.path.join(work_dir, "page-%4p.svg")
+    cmd = ["dvisvgm", compiled, "-n", "-v", "0", "-p", "1-", "-o", svg_pattern]
+    if output_format == ".pdf":
+        cmd.insert(1, "--pdf")
+    if subprocess.run(cmd, capture_output=True).returncode != 0:
+        return None
+
+    pages = [os.path.join(work_dir, f"page-{i:04d}.svg") for i in range(1, len(bodies) + 1)]
+    if not all(os.path.exists(p) for p in pages):
+        return None
+    return pages
+
+
+@TRACER.traced("tex_precompile", "tex")
+def precompile(task_datas):
+    """
+    预编译一批任务里所有还没有 svg 缓存的 TeX 表达式。返回新编译的数量。
+    批量编译失败 (比如某个表达式有语法错误) 时什么都不做，交给 manim 逐个编译并报出具体错误。
+    """
+    items = []
+    for task_data in task_datas:
+        items.extend(collect_tex(task_data))
+
+    # 按编译器 + 导言区分组，同一组的表达式放进同一个文档
+    groups = {}
+    for mob_cls, string in dict.fromkeys(items):
+        tex_path, template = _tex_file_for(mob_cls, string)
+        if tex_path is None or os.path.exists(os.path.splitext(tex_path)[0] + ".svg"):
+            continue
+        with open(tex_path, "r", encoding="utf-8") as f:
+            preamble, _ = _split_document(f.read())
+        group_key = (template.tex_compiler, template.output_format, preamble)
+        groups.setdefault(group_key, (template, []))[1].append(tex_path)
+
+    compiled = 0
+    for template, tex_paths in groups.values():
+        tex_paths = list(dict.fromkeys(tex_paths))
+        # 临时目录放在 tex 缓存目录下，保证 os.replace 不跨文件系统
+        with tempfile.TemporaryDirectory(prefix=".ugp-tex-", dir=os.path.dirname(tex_paths[0])) as work_dir:
+            pages = _compile_batch(tex_paths, template, work_dir)
+            if pages is None:
+                print(f"⚠️ 批量编译 {len(tex_paths)} 个 TeX 表达式失败，回退为逐个编译")
+                continue
+            for tex_path, page in zip(tex_paths, pages):
+                os.replace(page, os.path.splitext(tex_path)[0] + ".svg")
+            compiled += len(tex_paths)
+    return compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一次性预编译任务里的全部 TeX 表达式")
+    parser.add_argument("tasks", nargs="+", help="render_task.json 路径")
+    args = parser.parse_args()
+
+    task_datas = []
+    for path in args.tasks:
+        with open(path, "r", encoding="utf-8") as f:
+            task_datas.append(json.load(f))
+    print(f"✅ 新编译 {precompile(task_datas)} 个 TeX 表达式 → {config.get_dir('tex_dir')}")
+
+
+if __name__ == "__main__":
+    main()
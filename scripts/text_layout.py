@@ -0,0 +1,192 @@
+# text_layout.py
+# 按字形宽度排版：中英混排的换行位置和字号在建 Text 之前就算好，每个字符串只建一次 Text。
+#
+# 字宽来自 PIL 读取的字体文件 (fc-match 找到和 Pango 相同的字体)，按字符缓存；
+# 每种样式 (字体 / 粗细 / 行距) 只建两个校准用的 Text，把"em"换算成场景单位。
+import functools
+import subprocess
+import unicodedata
+from layout_config import UGP_CONFIG
+
+_MEASURE_PX = 100   # PIL 测量用的字号 (像素)
+_CALIBRATION = "国国国国国国国国国国"
+
+# 禁则：不能出现在行首的标点 (挂到上一行行尾)、不能出现在行尾的标点 (带到下一行行首)
+_NO_LINE_START = set("，。、；：！？）」』】》〉…—·%‰℃,.;:!?)]}”’")
+_NO_LINE_END = set("（「『【《〈([{“‘")
+
+
+def _is_wide(ch):
+    return unicodedata.east_asian_width(ch) in ("W", "F")
+
+
+@functools.lru_cache(maxsize=None)
+def _font_file(pattern):
+    """fontconfig 模式 -> 字体文件路径；找不到 fc-match 时返回 None。"""
+    try:
+        result = subprocess.run(["fc-match", "-f", "%{file}", pattern], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return result.stdout.strip() or None
+
+
+@functools.lru_cache(maxsize=None)
+def _pil_font(pattern):
+    path = _font_file(pattern)
+    if path is None:
+        return None
+    try:
+        from PIL import ImageFont
+        return ImageFont.truetype(path, _MEASURE_PX)
+    except (ImportError, OSError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def advance(ch, font="", weight="NORMAL"):
+    """单个字符的前进宽度 (em)。CJK 字符用 CJK 字体量 (Pango 也会回退到它)，量不到时用经验值。"""
+    family = font or "sans-serif"
+    fc_weight = "bold" if weight.upper() == "BOLD" else "regular"
+    pattern = f"{family}:weight={fc_weight}" + (":lang=zh-cn" if _is_wide(ch) else "")
+    pil_font = _pil_font(pattern)
+    if pil_font is not None:
+        return pil_font.getlength(ch) / _MEASURE_PX
+    if _is_wide(ch):
+        return 1.0
+    return 0.3 if ch.isspace() else 0.55
+
+
+def text_width(text, font="", weight="NORMAL"):
+    return sum(advance(ch, font, weight) for ch in text)
+
+
+@functools.lru_cache(maxsize=None)
+def _calibrate(font, weight, line_spacing):
+    """
+    (每 em 的场景单位宽度, 单行高度, 行距) —— 都按 font_size=100 计。
+    用一行、两行两个真实的 Text 量出来，每个进程每种样式只做一次。
+    """
+    from manim import Text   # 换行 / 测宽是纯算术，只有校准和建对象才需要 manim
+    kwargs = {"font_size": 100, "font": font, "weight": weight}
+    if line_spacing is not None:
+        kwargs["line_spacing"] = line_spacing
+    one = Text(_CALIBRATION, **kwargs)
+    two = Text(_CALIBRATION + "\n" + _CALIBRATION, **kwargs)
+    unit_per_em = one.width / text_width(_CALIBRATION, font, weight)
+    return unit_per_em, one.height, two.height - one.height
+
+
+def _breaks_latin_run(ch):
+    """
+    西文 / 数字块在哪些字符处结束。ASCII 的 ",.;:!?)]}" 本来就不能出现在行首，留在块里：
+    "3.14159265"、"e.g."、"12:30" 不会从中间断开。全角标点和行尾禁则标点仍然结束这一块。
+    """
+    if ch.isspace() or _is_wide(ch) or ch == "$" or ch in _NO_LINE_END:
+        return True
+    return ch in _NO_LINE_START and not ch.isascii()
+
+
+def _tokens(text):
+    """
+    拆成不可再分的排版单元：每个 CJK 字符单独成块，连续的西文 / 数字 / $...$ 公式成块，空格单独成块。
+    行首禁则只作用在块与块之间：单独成块的行首禁则标点并进前一块，行尾禁则标点并进后一块。
+    """
+    raw = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "$" and "$" in text[i + 1:]:
+            j = text.index("$", i + 1) + 1
+        elif ch.isspace() or _is_wide(ch) or ch in _NO_LINE_START or ch in _NO_LINE_END:
+            j = i + 1
+        else:
+            j = i + 1
+            while j < len(text) and not _breaks_latin_run(text[j]):
+                j += 1
+        raw.append(text[i:j])
+        i = j
+
+    tokens = []
+    carry = ""
+    for tok in raw:
+        if tok in _NO_LINE_END:
+            carry += tok
+        elif tok in _NO_LINE_START and tokens and not tokens[-1].isspace():
+            tokens[-1] += carry + tok
+            carry = ""
+        else:
+            tokens.append(carry + tok)
+            carry = ""
+    if carry:
+        tokens.append(carry)
+    return tokens
+
+
+def wrap(text, max_em, font="", weight="NORMAL"):
+    """按宽度 (em) 贪心换行，返回行列表。原文里的换行符保留；一个块比整行还宽时按字符硬切。"""
+    lines = []
+    for paragraph in text.split("\n"):
+        line, width = "", 0.0
+        for tok in _tokens(paragraph):
+            w = text_width(tok, font, weight)
+            if tok.isspace():
+                if line:
+                    line, width = line + tok, width + w
+                continue
+            if width + w > max_em and line.strip():
+                lines.append(line.rstrip())
+                line, width = "", 0.0
+            if w > max_em:
+                for ch in tok:
+                    cw = advance(ch, font, weight)
+                    if width + cw > max_em and line and ch not in _NO_LINE_START:
+                        lines.append(line)
+                        line, width = "", 0.0
+                    line, width = line + ch, width + cw
+                continue
+            line, width = line + tok, width + w
+        lines.append(line.rstrip())
+    return lines
+
+
+def fit(text, max_width, max_height, font_size, font="", weight="NORMAL", line_spacing=None,
+        min_scale=0.5, step=0.95):
+    """
+    在 max_width x max_height (场景单位) 内放下 text：从 font_size 开始，放不下就按 step 缩小字号重新换行。
+    纯算术，不建 Text。返回 (带换行符的文本, 字号)。
+    """
+    unit_per_em, line_h, pitch = _calibrate(font, weight, line_spacing)
+    size = font_size
+    while True:
+        scale = size / 100
+        lines = wrap(text, max_width / (unit_per_em * scale), font, weight)
+        height = (line_h + pitch * (len(lines) - 1)) * scale
+        if height <= max_height or size <= font_size * min_scale:
+            return "\n".join(lines), size
+        size *= step
+
+
+def text_spec(text, max_width, max_height, font_size, font=None, weight="NORMAL", line_spacing=None, **kwargs):
+    """fit() 的结果整理成 Text 的参数 (纯数据，可以交给别的进程去建同一个 Text)。"""
+    font = UGP_CONFIG["text_font"] if font is None else font
+    wrapped, size = fit(text, max_width, max_height, font_size, font, weight, line_spacing)
+    if line_spacing is not None:
+        kwargs["line_spacing"] = line_spacing
+    if hasattr(kwargs.get("color"), "to_hex"):
+        kwargs["color"] = kwargs["color"].to_hex()
+    kwargs.update(text=wrapped, font_size=size, font=font, weight=weight)
+    return kwargs
+
+
+def build_text(spec, max_width, max_height):
+    """按 text_spec 建 Text；字宽估计有偏差时最后用 scale 兜底 (scale 不会重新排版)。"""
+    from manim import Text
+    label = Text(**spec)
+    if label.width > max_width or label.height > max_height:
+        label.scale(min(max_width / label.width, max_height / label.height))
+    return label
+
+
+def fitted_text(text, max_width, max_height, font_size, **kwargs):
+    """fit() 之后只建一个 Text。"""
+    return build_text(text_spec(text, max_width, max_height, font_size, **kwargs), max_width, max_height)
@@ -0,0 +1,58 @@
+# tts_cache.py
+# 共享的 TTS 音频缓存：按 (文本, 语言, 音色, 引擎) 的哈希存放，renderer 和 gen_audio 共用
+import json
+import os
+from disk_cache import DiskCache, make_key
+from mp3_info import mp3_duration
+
+# ================= Configuration =================
+# 可以用环境变量指向共享目录 (比如多台机器挂载的同一个盘)
+CACHE_DIR = os.environ.get("UGP_TTS_CACHE", os.path.expanduser("~/.cache/ugp/tts"))
+CACHE_MAX_BYTES = int(os.environ.get("UGP_TTS_CACHE_MAX_BYTES", 2 * 1024 ** 3))  # 默认 2GB
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(CACHE_DIR, CACHE_MAX_BYTES)
+    return _cache
+
+
+def voice_key(text, lang, voice, engine):
+    return make_key("tts", text, lang, voice, engine)
+
+
+def lookup(text, lang="", voice="", engine="gtts"):
+    """已经合成过就直接返回缓存里的 mp3 路径，否则返回 None。"""
+    return get_cache().get(voice_key(text, lang, voice, engine), ".mp3")
+
+
+def writing(text, lang="", voice="", engine="gtts"):
+    """
+    用法:
+        with tts_cache.writing(text, lang, voice, engine) as tmp_path:
+            gTTS(text=text, lang=lang).save(tmp_path)
+    """
+    return get_cache().writing(voice_key(text, lang, voice, engine), ".mp3")
+
+
+def clip_duration(mp3_path):
+    """
+    缓存条目的真实时长 (秒)。第一次解析 MP3 帧头，结果写到同 key 的 .json 里，
+    之后直接读取；淘汰时和 mp3 一起删除。
+    """
+    meta_path = os.path.splitext(mp3_path)[0] + ".json"
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)["duration"]
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    seconds = mp3_duration(mp3_path)
+    key = os.path.basename(os.path.splitext(mp3_path)[0])
+    with get_cache().writing(key, ".json") as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"duration": seconds}, f)
+    return seconds
@@ -0,0 +1,60 @@
+# tts_engines.py
+# 可插拔的 TTS 引擎：统一成 async save(text, path, lang, voice) 接口
+import asyncio
+import math
+import unicodedata
+
+# 静音 MP3 帧：MPEG-1 Layer III, 48kHz, 32kbps, 单声道
+# 每帧 1152 个采样 = 24ms，帧长 144 * 32000 / 48000 = 96 字节；side info 全 0 即为静音
+_SILENT_FRAME = bytes([0xFF, 0xFB, 0x14, 0xC0]) + bytes(92)
+_SILENT_FRAME_SECONDS = 1152 / 48000
+
+
+def write_silent_mp3(path, seconds):
+    """写一个指定时长的静音 mp3 (不依赖任何编码器)。"""
+    frames = max(1, math.ceil(seconds / _SILENT_FRAME_SECONDS))
+    with open(path, "wb") as f:
+        f.write(_SILENT_FRAME * frames)
+
+
+class GTTSEngine:
+    name = "gtts"
+
+    async def save(self, text, path, lang="en", voice=""):
+        from gtts import gTTS
+        # gTTS 是同步的网络请求，丢到线程里跑，不阻塞事件循环
+        await asyncio.to_thread(lambda: gTTS(text=text, lang=lang).save(path))
+
+
+class EdgeEngine:
+    name = "edge"
+
+    async def save(self, text, path, lang="", voice="zh-CN-YunxiNeural"):
+        import edge_tts
+        await edge_tts.Communicate(text, voice).save(path)
+
+
+class StubEngine:
+    """离线桩引擎：按字数估算时长，生成静音 mp3。用于测试和 benchmark，不联网。"""
+    name = "stub"
+    cjk_seconds = 0.22      # 每个中日韩字符
+    other_seconds = 0.06    # 每个其他字符
+
+    def estimate_seconds(self, text):
+        total = 0.0
+        for ch in text:
+            wide = unicodedata.east_asian_width(ch) in ("W", "F")
+            total += self.cjk_seconds if wide else self.other_seconds
+        return max(0.5, total)
+
+    async def save(self, text, path, lang="", voice=""):
+        write_silent_mp3(path, self.estimate_seconds(text))
+
+
+ENGINES = {cls.name: cls for cls in (GTTSEngine, EdgeEngine, StubEngine)}
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError(f"未知的 TTS 引擎: {name} (可选: {', '.join(ENGINES)})")
+    return ENGINES[name]()
@@ -0,0 +1,80 @@
+# tts_prefetch.py
+# 语音预取：在渲染开始前，把一个(或一批)任务里所有台词并发合成进 TTS 缓存
+import argparse
+import asyncio
+import json
+import os
+import tts_cache
+from tts_engines import get_engine
+from profiler import TRACER
+
+DEFAULT_CONCURRENCY = 4
+
+
+def collect_texts(task_data):
+    """
+    收集一个任务里所有要念的句子 (去重、保持顺序)。
+    支持 render_task.json (timeline[].voice) 和 教学指令.json (列表[].speech) 两种格式。
+    """
+    steps = task_data["timeline"] if isinstance(task_data, dict) else task_data
+    texts = []
+    for step in steps:
+        text = step.get("voice") or step.get("speech") or ""
+        if text and text not in texts:
+            texts.append(text)
+    return texts
+
+
+async def _synthesize(text, engine, lang, voice, semaphore):
+    path = tts_cache.lookup(text, lang, voice, engine.name)
+    if path:
+        return text, path
+    async with semaphore:
+        with tts_cache.writing(text, lang, voice, engine.name) as tmp_path:
+            await engine.save(text, tmp_path, lang=lang, voice=voice)
+    return text, tts_cache.get_cache().path(tts_cache.voice_key(text, lang, voice, engine.name), ".mp3")
+
+
+async def prefetch_async(texts, engine_name, lang="", voice="", concurrency=DEFAULT_CONCURRENCY):
+    """并发合成 texts，同时在途的请求数不超过 concurrency。返回 {text: mp3 路径}。"""
+    engine = get_engine(engine_name)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*[
+        _synthesize(text, engine, lang, voice, semaphore) for text in dict.fromkeys(texts)
+    ])
+    # 顺便测好每段音频的真实时长，渲染时直接读缓存
+    for _, path in results:
+        tts_cache.clip_duration(path)
+    return dict(results)
+
+
+@TRACER.traced("tts_prefetch", "tts")
+def prefetch(task_datas, engine_name, lang="", voice="", concurrency=DEFAULT_CONCURRENCY):
+    """同步入口：预取一批任务的全部台词。"""
+    texts = []
+    for task_data in task_datas:
+        texts.extend(collect_texts(task_data))
+    return asyncio.run(prefetch_async(texts, engine_name, lang, voice, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发预合成任务里的全部台词")
+    parser.add_argument("tasks", nargs="+", help="render_task.json 或 教学指令.json")
+    parser.add_argument("--engine", default=os.environ.get("UGP_TTS_ENGINE", "gtts"))
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--voice", default="")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    task_datas = []
+    for path in args.tasks:
+        with open(path, "r", encoding="utf-8") as f:
+            task_datas.append(json.load(f))
+
+    paths = prefetch(task_datas, args.engine, args.lang, args.voice, args.concurrency)
+    cache = tts_cache.get_cache()
+    print(f"✅ 预取完成: {len(paths)} 句台词 (缓存命中 {cache.hits}，新合成 {cache.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,169 @@
-from PIL import Image, ImageDraw, ImageFont
-import math
-
-# ==========================================
-# 1. 生成相对网格 (10x10 Grid, 0.0-1.0)
-# ==========================================
-def add_smart_grid(image_path, output_path):
-    """
-    给图片叠加 10x10 的红色网格，标注 0.0 - 1.0。
-    用于让 LLM 进行相对坐标估算。
-    """
-    with Image.open(image_path).convert("RGBA") as base:
-        width, height = base.size
-        
-        # 创建覆盖层
-        overlay = Image.new("RGBA", base.size, (255, 255, 255, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # 颜色配置
-        line_color = (255, 0, 0, 128)  # 半透明红
-        text_color = (255, 0, 0, 255)  # 实心红
-        
-        # 字体大小自适应 (宽度的 2%)
-        try:
-            font_size = max(12, int(width * 0.02))
-            font = ImageFont.truetype("arial.ttf", size=font_size)
-        except:
-            font = ImageFont.load_default()
-
-        # 步长 (十分之一)
-        step_x = width / 10.0
-        step_y = height / 10.0
-
-        # 画竖线 (X轴 0.0 - 1.0)
-        for i in range(11):
-            x = int(i * step_x)
-            # 修正边缘防止画出界
-            if x >= width: x = width - 1
-            
-            draw.line([(x, 0), (x, height)], fill=line_color, width=2)
-            # 标注 (0.1, 0.2...)
-            label = f"{i/10:.1f}"
-            draw.text((x + 2, 5), label, fill=text_color, font=font)
-
-        # 画横线 (Y轴 0.0 - 1.0)
-        for i in range(11):
-            y = int(i * step_y)
-            if y >= height: y = height - 1
-            
-            draw.line([(0, y), (width, y)], fill=line_color, width=2)
-            label = f"{i/10:.1f}"
-            draw.text((5, y + 2), label, fill=text_color, font=font)
-
-        # 合并保存
-        out = Image.alpha_composite(base, overlay)
-        out.convert("RGB").save(output_path, quality=95)
-        
-        # 返回真实宽高，供 Renderer 计算长宽比
-        return width, height
-
-# ==========================================
-# 2. 归一化处理 (数据打包)
-# ==========================================
-def process_layout_data(llm_raw_data, real_width, real_height):
-    """
-    输入：LLM 返回的相对坐标 {"A": [0.5, 0.5]}
-    处理：计算图片真实长宽比，打包数据。
-    输出：Renderer 所需的 layout_info 结构。
-    """
-    aspect_ratio = real_width / real_height
-    
-    return {
-        "aspect_ratio": aspect_ratio,     # 关键：告诉 Renderer 原图是扁的还是长的
-        "relative_layout": llm_raw_data   # 透传坐标
-    }
\ No newline at end of file
+from PIL import Image, ImageDraw, ImageFont
+import functools
+import math
+import numpy as np
+from profiler import TRACER
+
+# ==========================================
+# 1. 生成相对网格 (10x10 Grid, 0.0-1.0)
+# ==========================================
+GRID_FONTS = ("arial.ttf", "DejaVuSans.ttf")
+
+
+@functools.lru_cache(maxsize=None)
+def grid_font(size):
+    """标注字体按字号缓存：批量处理时每个进程每种字号只加载一次。"""
+    for name in GRID_FONTS:
+        try:
+            return ImageFont.truetype(name, size=size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _blend_strip(img, box, color, alpha):
+    """只把网格线覆盖的细条和颜色按 alpha 混合，不分配整张 RGBA 覆盖层。"""
+    strip = img.crop(box)
+    img.paste(Image.blend(strip, Image.new("RGB", strip.size, color), alpha), box)
+
+
+@TRACER.traced("add_smart_grid", "image")
+def add_smart_grid(image_path, output_path, max_side=None):
+    """
+    给图片叠加 10x10 的红色网格，标注 0.0 - 1.0。
+    用于让 LLM 进行相对坐标估算。
+
+    max_side: 输出图最长边上限 (LLM 输入分辨率)。JPEG 解码时直接按 1/2、1/4、1/8 缩小 (draft)，
+    大扫描件不用先解出全尺寸。网格是相对坐标，缩小不影响标注。
+    """
+    with Image.open(image_path) as src:
+        # 返回原图真实宽高，供 Renderer 计算长宽比
+        width, height = src.size
+        if max_side and max(width, height) > max_side:
+            # draft 的缩小倍数取 min(w // 目标宽, h // 目标高)：目标必须按原图长宽比给，
+            # 给正方形时短边那一项总是 1，6000x4000 这样的大扫描件照样全尺寸解码
+            scale = max_side / max(width, height)
+            src.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+        img = src.convert("RGB")
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+    w, h = img.size
+    draw = ImageDraw.Draw(img)
+
+    # 颜色配置
+    line_color = (255, 0, 0)  # 红色，按 50% 透明度混合
+    text_color = (255, 0, 0)  # 实心红
+
+    # 字体大小自适应 (宽度的 2%)
+    font = grid_font(max(12, int(w * 0.02)))
+
+    # 步长 (十分之一)
+    step_x = w / 10.0
+    step_y = h / 10.0
+
+    # 画竖线 (X轴 0.0 - 1.0)，修正边缘防止画出界
+    for i in range(11):
+        x = min(int(i * step_x), w - 2)
+        _blend_strip(img, (x, 0, x + 2, h), line_color, 0.5)
+    # 画横线 (Y轴 0.0 - 1.0)
+    for i in range(11):
+        y = min(int(i * step_y), h - 2)
+        _blend_strip(img, (0, y, w, y + 2), line_color, 0.5)
+
+    # 标注 (0.1, 0.2...) 最后画，不被网格线盖住
+    for i in range(11):
+        label = f"{i/10:.1f}"
+        draw.text((min(int(i * step_x), w - 1) + 2, 5), label, fill=text_color, font=font)
+        draw.text((5, min(int(i * step_y), h - 1) + 2), label, fill=text_color, font=font)
+
+    img.save(output_path, quality=95)
+    return width, height
+
+# ==========================================
+# 2. 归一化处理 (数据打包)
+# ==========================================
+def process_layout_data(llm_raw_data, real_width, real_height):
+    """
+    输入：LLM 返回的相对坐标 {"A": [0.5, 0.5]}
+    处理：计算图片真实长宽比，打包数据。
+    输出：Renderer 所需的 layout_info 结构。
+    """
+    aspect_ratio = real_width / real_height
+    
+    return {
+        "aspect_ratio": aspect_ratio,     # 关键：告诉 Renderer 原图是扁的还是长的
+        "relative_layout": llm_raw_data   # 透传坐标
+    }
+
+# ==========================================
+# 3. 坐标归一化 (相对坐标 -> 逻辑画布坐标)
+# ==========================================
+CANVAS_LONG_SIDE = 1000     # 逻辑画布最长边
+OUTLIER_TOLERANCE = 0.05    # 超出 [0, 1] 这么多以上算离群 (LLM 估算允许少量越界)
+OUTLIER_Z = 3.5             # 到中位点距离的 modified z-score 超过它算离群
+COORD_UNITS = ("auto", "relative", "pixel")
+
+
+def canvas_size_for(real_width, real_height, long_side=CANVAS_LONG_SIDE):
+    """按原图长宽比，最长边为 long_side 的逻辑画布尺寸 [w, h]。"""
+    if real_width >= real_height:
+        return [long_side, max(1, round(long_side * real_height / real_width))]
+    return [max(1, round(long_side * real_width / real_height)), long_side]
+
+
+def normalize_coords(layout_map, real_width, real_height, long_side=CANVAS_LONG_SIDE,
+                     tolerance=OUTLIER_TOLERANCE, units="auto"):
+    """
+    输入：LLM 返回的坐标 {"A": [0.5, 0.5], ...}，可以是 0-1 相对坐标，也可以是原图像素坐标。
+          units="auto" 时逐点判断，按多数点决定整张图的单位；和多数不一致的点按越界处理。
+    处理：整张 layout_map 一次性向量化计算：归一化、截断到 [0, 1]、按原图长宽比映射到逻辑画布。
+          无法解析、明显越界、或离其余点过远的点标记为 outlier (坐标仍截断到画面内)。
+    输出：(layout, canvas_size)
+          layout = {"A": {"norm": [x, y], "canvas": [X, Y], "outlier": bool}, ...}
+    """
+    names = list(layout_map)
+    canvas = canvas_size_for(real_width, real_height, long_side)
+    if not names:
+        return {}, canvas
+
+    def as_xy(value):
+        try:
+            x, y = value[:2]
+            return float(x), float(y)
+        except (TypeError, ValueError):
+            return np.nan, np.nan
+
+    arr = np.array([as_xy(layout_map[n]) for n in names], dtype=float)
+    invalid = np.isnan(arr).any(axis=1)
+
+    # 像素坐标：逐点看是否明显超过 1 (容差之外)，多数点是像素坐标时整体按原图尺寸换算。
+    # 不能只看全图最大值：一个写错的相对坐标 (如 [2.0, 0.5]) 会把所有点都当成像素坐标缩到 0 附近
+    if units not in COORD_UNITS:
+        raise ValueError(f"units 只能是 {COORD_UNITS} 之一: {units!r}")
+    if units == "auto":
+        looks_pixel = np.abs(np.where(invalid[:, None], 0.0, arr)).max(axis=1) > 1 + 10 * tolerance
+        units = "pixel" if looks_pixel[~invalid].sum() * 2 > (~invalid).sum() else "relative"
+    if units == "pixel":
+        arr = arr / [real_width, real_height]
+
+    out_of_range = ((arr < -tolerance) | (arr > 1 + tolerance)).any(axis=1)
+
+    # 离群：到中位点距离的 modified z-score (MAD)，点太少时不判
+    far = np.zeros(len(names), dtype=bool)
+    valid = ~invalid
+    if valid.sum() >= 5:
+        dist = np.linalg.norm(arr - np.median(arr[valid], axis=0), axis=1)
+        mad = np.median(np.abs(dist[valid] - np.median(dist[valid])))
+        if mad > 0:
+            far = valid & (0.6745 * (dist - np.median(dist[valid])) / mad > OUTLIER_Z)
+
+    norm = np.clip(np.where(invalid[:, None], 0.5, arr), 0.0, 1.0)
+    scaled = np.round(norm * canvas, 1)
+    norm = np.round(norm, 4)
+    outlier = invalid | out_of_range | far
+
+    layout = {
+        name: {"norm": norm[i].tolist(), "canvas": scaled[i].tolist(), "outlier": bool(outlier[i])}
+        for i, name in enumerate(names)
+    }
+    return layout, canvas
@@ -0,0 +1,91 @@
+# video_tools.py
+# ffmpeg 小工具：拼接、封装等 (全部走 subprocess 调用系统 ffmpeg)
+import os
+import subprocess
+import tempfile
+from profiler import TRACER
+
+FFMPEG = os.environ.get("UGP_FFMPEG", "ffmpeg")
+FFPROBE = os.environ.get("UGP_FFPROBE", "ffprobe")
+
+
+@TRACER.traced("ffmpeg", "ffmpeg")
+def run_ffmpeg(args):
+    """执行 ffmpeg，失败时把 stderr 带进异常信息里。"""
+    cmd = [FFMPEG, "-y", "-hide_banner", "-loglevel", "error"] + list(args)
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 失败: {' '.join(cmd)}\n{result.stderr.strip()}")
+
+
+def concat_copy(paths, output_path):
+    """用 concat demuxer + stream copy 把若干段编码参数一致的视频首尾相接，不重新编码。"""
+    fd, list_path = tempfile.mkstemp(suffix=".txt", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", r"'\''")
+                f.write(f"file '{escaped}'\n")
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path,
+                    "-c", "copy", "-movflags", "+faststart", output_path])
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def mux_audio(video_path, audio_path, output_path, audio_bitrate="128k"):
+    """视频流原样复制，配上一条外部音轨 (编码成 AAC)。"""
+    run_ffmpeg(["-i", video_path, "-i", audio_path, "-map", "0:v:0", "-map", "1:a:0",
+                "-c:v", "copy", "-c:a", "aac", "-b:a", audio_bitrate, "-movflags", "+faststart", output_path])
+    return output_path
+
+
+def mux_ts_segment(video_path, audio_path, output_path, ts_offset, audio_bitrate="128k"):
+    """
+    一段视频 + 对应的音频封装成 HLS 用的 MPEG-TS 分段：视频流原样复制，时间戳整体平移到 ts_offset 秒，
+    各分段首尾相接时间轴连续，不需要 EXT-X-DISCONTINUITY。
+    """
+    run_ffmpeg(["-i", video_path, "-i", audio_path, "-map", "0:v:0", "-map", "1:a:0",
+                "-c:v", "copy", "-bsf:v", "h264_mp4toannexb", "-c:a", "aac", "-b:a", audio_bitrate,
+                "-output_ts_offset", f"{ts_offset:.6f}", "-muxdelay", "0", "-f", "mpegts", output_path])
+    return output_path
+
+
+def transcode_scaled(input_path, output_path, width, height, crf=23, keyint_seconds=10, frame_rate=None, threads=0):
+    """
+    缩放转码一路输出 (音频原样复制)。参数针对大面积纯色、大部分时间静止的讲题画面：
+    -tune animation 加大参考帧数、减弱纯色块的去块滤波，preset slow 在小分辨率上不贵但码率省得多；
+    关键帧间隔放宽到 keyint_seconds，静止画面靠 P 帧 skip 块几乎不占码率。
+    frame_rate 给定时同时降帧 (ffmpeg 按时间戳抽帧，整数倍时正好隔帧取)。
+    """
+    gop = round(keyint_seconds * frame_rate) if frame_rate else 250
+    rate = ["-r", str(frame_rate)] if frame_rate else []
+    run_ffmpeg(["-i", input_path, "-map", "0:v:0", "-map", "0:a?", *rate,
+                "-vf", f"scale={width}:{height}:flags=lanczos", "-c:v", "libx264", "-preset", "slow",
+                "-tune", "animation", "-crf", str(crf), "-pix_fmt", "yuv420p", "-g", str(gop),
+                "-threads", str(threads), "-c:a", "copy", "-movflags", "+faststart", output_path])
+    return output_path
+
+
+def encode_still(image_path, frames, frame_rate, output_path):
+    """
+    一张图编码成 frames 帧的静止片段，和 manim 自己的分段一起 stream copy 拼接。
+    combine_to_movie 只用第一段的 avcC，所以 x264 参数必须和 manim 分段完全一致
+    (libx264 / 默认 preset medium / yuv420p / crf 23 / high profile)，不能加 -tune：
+    例如 stillimage 会改 psy-rd，进而改 PPS 的 chroma_qp_index_offset，拼接后色度解码错误。
+    重复帧本来就编码成 skip 块，不加 tune 也几乎不花时间。
+    """
+    run_ffmpeg(["-loop", "1", "-framerate", str(frame_rate), "-i", image_path, "-frames:v", str(frames),
+                "-c:v", "libx264", "-preset", "medium", "-profile:v", "high", "-pix_fmt", "yuv420p",
+                "-crf", "23", output_path])
+    return output_path
+
+
+def count_frames(path):
+    """视频流的实际帧数 (逐包计数，不解码)。"""
+    cmd = [FFPROBE, "-v", "error", "-select_streams", "v:0", "-count_packets",
+           "-show_entries", "stream=nb_read_packets", "-of", "csv=p=0", path]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe 失败: {' '.join(cmd)}\n{result.stderr.strip()}")
+    return int(result.stdout.strip())